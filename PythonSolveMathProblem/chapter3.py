@@ -1,19 +1,33 @@
 """《Python玩转数学问题》Chapter 3 函数与分支."""
 
 import math
+from dataclasses import dataclass
 
+import numpy as np
 import pytest
+from scipy.special import gammaln
 
 
 # 使用阶乘计算组合数和排列数
-def permutation(total_amount: int, pick_amount: int) -> float:
-    r"""使用阶乘计算排列.
+def _check_pick(total_amount: int, pick_amount: int) -> None:
+    """检查排列组合的参数."""
+    if total_amount < 0 or pick_amount < 0:
+        err_msg: str = "元素个数必须为非负整数"
+        raise ValueError(err_msg)
+    if pick_amount > total_amount:
+        err_msg = "取出的元素个数不能大于元素总数"
+        raise ValueError(err_msg)
+
+
+def permutation(total_amount: int, pick_amount: int) -> int:
+    r"""计算排列数.
 
     排列: 从 n 个不同的元素中, 取 r 个不重复的元素, 按次序排列
     其全体集合用 A(n, r) 表示
 
-    计算公式: $A_n^r = n*(n-1)*...*(n-r+1) = \\frac{n!}{(n-r)!}$
+    计算公式: $A_n^r = n*(n-1)*...*(n-r+1) = \frac{n!}{(n-r)!}$
 
+    只连乘需要的 r 个因子, 用整数精确计算, 不会像阶乘相除那样在 n > 170 时溢出
     可以使用 math.perm(n, r) 直接获取结果
 
     Args:
@@ -21,23 +35,25 @@ def permutation(total_amount: int, pick_amount: int) -> float:
         pick_amount (int): 预期取出的不重复元素个数
 
     Returns:
-        float: 从 n 个元素中取 r 个的不重排列个数
+        int: 从 n 个元素中取 r 个的不重排列个数
 
     """
-    return math.factorial(total_amount) / math.factorial(total_amount - pick_amount)
+    _check_pick(total_amount, pick_amount)
+    return math.prod(range(total_amount - pick_amount + 1, total_amount + 1))
 
 
-def combination(total_amount: int, pick_amount: int) -> float:
-    r"""使用阶乘计算组合.
+def combination(total_amount: int, pick_amount: int) -> int:
+    r"""计算组合数.
 
     排列: 从 n 个不同的元素中, 取 r 个不重复的元素, 不考虑其元素顺序
     其全体集合用 C(n, r) 表示
     相当于把排列带来的顺序去掉
 
-    计算公式: $C_n^r = n*(n-1)*...*(n-r+1) = \\frac{n!}{(r)!*(n-r)!}$
+    计算公式: $C_n^r = n*(n-1)*...*(n-r+1) = \frac{n!}{(r)!*(n-r)!}$
     $C_n^r  = A_n^r / A_r^r$
-    $C_n^r = $
+    $C_n^r = C_n^{n-r}$
 
+    取 r 与 n - r 中较小的一个, 边乘边除: 第 i 步的结果恰为 $C_{n-r+i}^i$, 每次整除都没有余数
     可以使用 math.comb(n, r) 直接获取结果
 
     Args:
@@ -45,12 +61,177 @@ def combination(total_amount: int, pick_amount: int) -> float:
         pick_amount (int): 预期取出的不重复元素个数
 
     Returns:
-        float: 从 n 个元素中取 r 个的无重组合个数
+        int: 从 n 个元素中取 r 个的无重组合个数
+
+    """
+    _check_pick(total_amount, pick_amount)
+    r: int = min(pick_amount, total_amount - pick_amount)
+    result: int = 1
+    for i in range(1, r + 1):
+        result = result * (total_amount - r + i) // i
+    return result
+
+
+def log_perm(total_amount: float, pick_amount: float) -> float:
+    r"""排列数的自然对数 $\ln A_n^r = \ln\Gamma(n+1) - \ln\Gamma(n-r+1)$, 适用于 n 很大的情形.
+
+    Args:
+        total_amount (float): 元素的总集合
+        pick_amount (float): 预期取出的不重复元素个数
+
+    Returns:
+        float: ln A(n, r)
+
+    """
+    _check_pick(total_amount, pick_amount)
+    return float(_log_falling(total_amount, pick_amount))
+
+
+def log_comb(total_amount: float, pick_amount: float) -> float:
+    r"""组合数的自然对数 $\ln C_n^r = \ln\Gamma(n+1) - \ln\Gamma(r+1) - \ln\Gamma(n-r+1)$, 适用于 n 很大的情形.
+
+    Args:
+        total_amount (float): 元素的总集合
+        pick_amount (float): 预期取出的不重复元素个数
+
+    Returns:
+        float: ln C(n, r)
+
+    """
+    _check_pick(total_amount, pick_amount)
+    pick_amount = min(pick_amount, total_amount - pick_amount)
+    return float(_log_falling(total_amount, pick_amount)) - math.lgamma(pick_amount + 1)
+
+
+# n - r 不小于该值时用斯特林公式之差计算 ln(n! / (n-r)!), 避免两个很大的 lnΓ 相减
+_STIRLING_MIN: float = 1e4
+
+# 结果与中间乘积都小于 2^62 时在 int64 上精确计算
+_EXACT_LOG_LIMIT: float = 62 * math.log(2)
+
+
+def _log_falling(total_amount: float | np.ndarray, pick_amount: float | np.ndarray) -> np.ndarray:
+    r"""计算 $\ln\frac{n!}{(n-r)!}$.
+
+    n 很大时 lnΓ(n+1) 与 lnΓ(n-r+1) 都远大于两者之差, 直接相减会损失全部有效数字.
+    m = n - r 足够大时改用斯特林公式之差的稳定形式
+    $r\ln n - (m + \frac{1}{2})\ln(1 - \frac{r}{n}) - r + \frac{1}{12n} - \frac{1}{12m} - \frac{1}{360n^3} + \frac{1}{360m^3}$.
+    """
+    n: np.ndarray = np.asarray(total_amount, dtype=float)
+    r: np.ndarray = np.asarray(pick_amount, dtype=float)
+    m: np.ndarray = n - r
+    large: np.ndarray = m >= _STIRLING_MIN
+    # 两个分支都会计算, 不使用斯特林公式的位置代入安全值
+    inv_n: np.ndarray = 1 / np.where(large, n, 1.0)
+    inv_m: np.ndarray = 1 / np.where(large, m, 1.0)
+    safe_r: np.ndarray = np.where(large, r, 0.0)
+    stirling: np.ndarray = (
+        -safe_r * np.log(inv_n)
+        - (1 / inv_m + 0.5) * np.log1p(-safe_r * inv_n)
+        - safe_r
+        + (inv_n - inv_m) / 12
+        - (inv_n**3 - inv_m**3) / 360
+    )
+    return np.where(large, stirling, gammaln(n + 1) - gammaln(m + 1))
+
+
+def _pick_arrays(total_amount: np.ndarray, pick_amount: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """把 (n, r) 广播为 int64 数组并检查参数."""
+    n, r = np.broadcast_arrays(np.asarray(total_amount, dtype=np.int64), np.asarray(pick_amount, dtype=np.int64))
+    if np.any((n < 0) | (r < 0)):
+        err_msg: str = "元素个数必须为非负整数"
+        raise ValueError(err_msg)
+    if np.any(r > n):
+        err_msg = "取出的元素个数不能大于元素总数"
+        raise ValueError(err_msg)
+    return n, r
+
+
+def perm_array(total_amount: np.ndarray, pick_amount: np.ndarray) -> np.ndarray:
+    """批量计算排列数.
+
+    结果小于 2^62 的元素在 int64 上逐个因子连乘精确计算, 其余用 exp(lnA) 近似, 溢出时为 inf.
+
+    Args:
+        total_amount (np.ndarray): 各组的元素总数
+        pick_amount (np.ndarray): 各组取出的元素个数, 与 total_amount 广播
+
+    Returns:
+        np.ndarray: float64 数组, 小于 2^53 的结果是精确整数
 
     """
-    factorial = math.factorial
+    n, r = _pick_arrays(total_amount, pick_amount)
+    log_value: np.ndarray = _log_falling(n, r)
+    exact: np.ndarray = log_value < _EXACT_LOG_LIMIT
+    ne, re = n[exact], r[exact]
+    value: np.ndarray = np.ones(ne.shape, dtype=np.int64)
+    for i in range(int(re.max(initial=0))):
+        value = np.where(i < re, value * (ne - i), value)
+    with np.errstate(over="ignore"):
+        result: np.ndarray = np.exp(log_value)
+    result[exact] = value
+    return result
+
 
-    return factorial(total_amount) / (factorial(pick_amount) * factorial(total_amount - pick_amount))
+def comb_array(total_amount: np.ndarray, pick_amount: np.ndarray) -> np.ndarray:
+    """批量计算组合数.
+
+    中间乘积 r * C(n, r) 小于 2^62 的元素在 int64 上边乘边除精确计算, 其余用 exp(lnC) 近似, 溢出时为 inf.
+
+    Args:
+        total_amount (np.ndarray): 各组的元素总数
+        pick_amount (np.ndarray): 各组取出的元素个数, 与 total_amount 广播
+
+    Returns:
+        np.ndarray: float64 数组, 小于 2^53 的结果是精确整数
+
+    """
+    n, r = _pick_arrays(total_amount, pick_amount)
+    r = np.minimum(r, n - r)
+    log_value: np.ndarray = _log_falling(n, r) - gammaln(r + 1.0)
+    # 第 i 步的中间乘积为 i * C(n-r+i, i) <= r * C(n, r)
+    exact: np.ndarray = log_value + np.log(np.maximum(r, 1)) < _EXACT_LOG_LIMIT
+    ne, re = n[exact], r[exact]
+    value: np.ndarray = np.ones(ne.shape, dtype=np.int64)
+    for i in range(1, int(re.max(initial=0)) + 1):
+        value = np.where(i <= re, value * (ne - re + i) // i, value)
+    with np.errstate(over="ignore"):
+        result: np.ndarray = np.exp(log_value)
+    result[exact] = value
+    return result
+
+
+def test_combinatorics() -> None:
+    """permutation()与combination()等排列组合函数的测试函数."""
+    for n in (0, 1, 10, 171, 1000):
+        for r in (0, n // 3, n // 2, max(n - 1, 0), n):
+            assert permutation(n, r) == math.perm(n, r), f"A({n}, {r}) 计算错误"
+            assert combination(n, r) == math.comb(n, r), f"C({n}, {r}) 计算错误"
+    assert math.isclose(
+        log_comb(10**9, 5 * 10**8), math.log(2) * 10**9 - 0.5 * math.log(math.pi * 5e8), rel_tol=1e-12
+    ), "ln C(n, n/2) 与斯特林近似不符"
+    assert math.isclose(log_perm(1000, 10), math.log(math.perm(1000, 10))), "ln A(n, r) 计算错误"
+    with pytest.raises(ValueError, match="取出的元素个数不能大于元素总数"):
+        combination(3, 4)
+
+    n: np.ndarray = np.arange(0, 80)[:, None]
+    r: np.ndarray = np.arange(0, 80)[None, :]
+    mask: np.ndarray = r <= n
+    n, r = np.broadcast_arrays(n, r)
+    combs: np.ndarray = comb_array(n[mask], r[mask])
+    perms: np.ndarray = perm_array(n[mask], r[mask])
+    for ni, ri, c, p in zip(n[mask], r[mask], combs, perms, strict=True):
+        assert math.isclose(c, math.comb(ni, ri), rel_tol=1e-12), f"批量计算 C({ni}, {ri}) 错误"
+        assert math.isclose(p, math.perm(ni, ri), rel_tol=1e-12), f"批量计算 A({ni}, {ri}) 错误"
+        if math.comb(ni, ri) < 2**53:
+            assert c == math.comb(ni, ri), f"C({ni}, {ri}) < 2^53 时应为精确值"
+    assert comb_array(10**7, [1, 2]).tolist() == [math.comb(10**7, k) for k in (1, 2)], "大 n 小 r 时应精确"
+    huge: np.ndarray = comb_array(10**15, [3, 10**5])
+    assert math.isclose(huge[0], math.comb(10**15, 3), rel_tol=1e-12), "大 n 时 lnΓ 相减不应损失精度"
+    assert np.isinf(huge[1]), "溢出时应为 inf"
+    assert math.isclose(log_perm(10**18, 2), math.log(10**18 * (10**18 - 1)), rel_tol=1e-15), (
+        "大 n 时 ln A 不应损失精度"
+    )
 
 
 # math 模块中的常量
@@ -336,6 +517,7 @@ def quadratic_formula(a: float, b: float, c: float) -> list[float] | None:
     当 $\Delta$ = 0, 方程只有 1 个实数根, 可简化为 $x = \frac{-b}{2a}$
     当 $\Delta$ < 0, 方程没有实数根, 但在复数范围,
     方程有两个共轭复数跟 $x = \frac{-b}{2a} \pm \frac{\sqrt{-(b^2 - 4ac)}}{2a}i$
+    实际计算时使用不会发生抵消的等价形式 $q = -\frac{b + sgn(b)\sqrt{\Delta}}{2}, x_1 = \frac{q}{a}, x_2 = \frac{c}{q}$
 
     Args:
         a (float): 二次项系数
@@ -348,8 +530,10 @@ def quadratic_formula(a: float, b: float, c: float) -> list[float] | None:
     """
     delta: float = b**2 - 4 * a * c
     if delta > 0:
-        x_1: float = ((-b) + math.sqrt(delta)) / (2 * a)
-        x_2: float = ((-b) - math.sqrt(delta)) / (2 * a)
+        # -b 与 ±sqrt(delta) 同号相加, 避免 b^2 >> 4ac 时两个相近的数相减损失精度, 另一个根由韦达定理 x1 * x2 = c / a 求出
+        q: float = -(b + math.copysign(math.sqrt(delta), b)) / 2
+        x_1: float = c / q if b >= 0 else q / a
+        x_2: float = q / a if b >= 0 else c / q
         print(f"方程具有 2 个实数根, 分别是 {x_1} 和 {x_2}")
         return [x_1, x_2]
     elif delta == 0:
@@ -361,6 +545,262 @@ def quadratic_formula(a: float, b: float, c: float) -> list[float] | None:
         return None
 
 
+@dataclass(frozen=True)
+class PolyRoots:
+    """一批多项式方程的根.
+
+    Attributes:
+        roots (np.ndarray): 复数数组, 形状为 (..., n), 每个方程的 n 个根(计重数), 实数根排在前面并按升序排列
+        n_real (np.ndarray): 整数数组, 每个方程的实数根个数(计重数)
+
+    """
+
+    roots: np.ndarray
+    n_real: np.ndarray
+
+    @property
+    def real(self) -> np.ndarray:
+        """实数根, 形状与 roots 相同, 非实数根的位置为 NaN."""
+        return np.where(np.arange(self.roots.shape[-1]) < self.n_real[..., None], self.roots.real, np.nan)
+
+
+def _leading(coefficient: np.ndarray) -> np.ndarray:
+    """检查首项系数均不为 0."""
+    if np.any(coefficient == 0):
+        err_msg: str = "首项系数不能为 0"
+        raise ValueError(err_msg)
+    return coefficient
+
+
+def quadratic_batch(a: np.ndarray, b: np.ndarray, c: np.ndarray) -> PolyRoots:
+    r"""批量求一元二次方程 $ax^2 + bx + c = 0$ 的根, 不做任何输出.
+
+    使用与 quadratic_formula() 相同的无抵消求根公式, 全部运算对整个数组进行.
+
+    Args:
+        a (np.ndarray): 二次项系数, 不能为 0
+        b (np.ndarray): 一次项系数
+        c (np.ndarray): 常数项系数, 三个系数互相广播
+
+    Returns:
+        PolyRoots: 每个方程的 2 个根; 判别式为 0 时两个实数根相等
+
+    """
+    a, b, c = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (a, b, c)))
+    _leading(a)
+    delta: np.ndarray = b * b - 4 * a * c
+    real: np.ndarray = delta >= 0
+    sq: np.ndarray = np.sqrt(np.abs(delta))
+    q: np.ndarray = -0.5 * (b + np.copysign(sq, b))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x_1: np.ndarray = q / a
+        # q = 0 只在 b = delta = 0 即 c = 0 时出现, 此时两根都是 0
+        x_2: np.ndarray = np.where(q == 0, 0.0, c / q)
+    roots: np.ndarray = np.empty((*a.shape, 2), dtype=complex)
+    roots.real[..., 0] = np.where(real, np.minimum(x_1, x_2), -b / (2 * a))
+    roots.real[..., 1] = np.where(real, np.maximum(x_1, x_2), roots.real[..., 0])
+    im: np.ndarray = np.where(real, 0.0, sq / np.abs(2 * a))
+    roots.imag[..., 0] = im
+    roots.imag[..., 1] = -im
+    return PolyRoots(roots, np.where(real, 2, 0))
+
+
+def _polyval(coeffs: np.ndarray, x: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """秦九韶算法同时计算多项式及其导数在 x 处的值, coeffs 最后一维从高次到低次."""
+    p: np.ndarray = np.broadcast_to(coeffs[..., :1], x.shape).astype(complex)
+    dp: np.ndarray = np.zeros_like(p)
+    for k in range(1, coeffs.shape[-1]):
+        dp = dp * x + p
+        p = p * x + coeffs[..., k : k + 1]
+    return p, dp
+
+
+def _finish(coeffs: np.ndarray, roots: np.ndarray, imag_tol: float, polish: int = 2) -> PolyRoots:
+    """牛顿迭代修正闭式解的舍入误差, 判定实数根并排序."""
+    for _ in range(polish):
+        p, dp = _polyval(coeffs, roots)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            step: np.ndarray = p / dp
+        new: np.ndarray = roots - np.where(np.isfinite(step), step, 0)
+        # 只接受能减小残差的修正(重根附近牛顿法可能反而变差)
+        roots = np.where(np.abs(_polyval(coeffs, new)[0]) < np.abs(p), new, roots)
+    is_real: np.ndarray = np.abs(roots.imag) <= imag_tol * np.maximum(1.0, np.abs(roots))
+    roots = np.where(is_real, roots.real + 0j, roots)
+    order: np.ndarray = np.argsort(np.where(is_real, roots.real, np.inf), axis=-1, kind="stable")
+    return PolyRoots(np.take_along_axis(roots, order, axis=-1), is_real.sum(axis=-1))
+
+
+def cubic_batch(
+    a: np.ndarray,
+    b: np.ndarray,
+    c: np.ndarray,
+    d: np.ndarray,
+    imag_tol: float = 1e-8,
+) -> PolyRoots:
+    r"""批量求一元三次方程 $ax^3 + bx^2 + cx + d = 0$ 的根.
+
+    代换 $x = t - \frac{b}{3a}$ 化为 $t^3 + pt + q = 0$, 判别式 $D = (q/2)^2 + (p/3)^3$:
+    D > 0 时用卡尔达诺公式(选取不会抵消的立方根), D <= 0 时有 3 个实数根, 用三角公式求解.
+    闭式解最后用牛顿法修正一到两步.
+
+    Args:
+        a (np.ndarray): 三次项系数, 不能为 0
+        b (np.ndarray): 二次项系数
+        c (np.ndarray): 一次项系数
+        d (np.ndarray): 常数项系数, 四个系数互相广播
+        imag_tol (float): 可选参数, 虚部相对大小不超过该值的根视为实数根
+
+    Returns:
+        PolyRoots: 每个方程的 3 个根
+
+    """
+    coeffs: np.ndarray = np.stack(np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (a, b, c, d))), axis=-1)
+    a = _leading(coeffs[..., 0])
+    b, c, d = coeffs[..., 1] / a, coeffs[..., 2] / a, coeffs[..., 3] / a
+    p: np.ndarray = c - b * b / 3
+    q: np.ndarray = 2 * b**3 / 27 - b * c / 3 + d
+    disc: np.ndarray = (q / 2) ** 2 + (p / 3) ** 3
+    one: np.ndarray = disc > 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # 一个实数根: u 取与 -q 同号的立方根, v = -p / (3u)
+        u: np.ndarray = -np.copysign(np.cbrt(np.abs(q) / 2 + np.sqrt(np.where(one, disc, 0))), q)
+        v: np.ndarray = np.where(u == 0, 0.0, -p / (3 * u))
+        # 三个实数根: p <= 0, 三角公式
+        r: np.ndarray = 2 * np.sqrt(np.maximum(-p / 3, 0))
+        phi: np.ndarray = np.arccos(np.clip(np.where(r == 0, 0.0, 4 * q / (-(r**3))), -1, 1)) / 3
+    k: np.ndarray = np.arange(3)
+    trig: np.ndarray = r[..., None] * np.cos(phi[..., None] - 2 * np.pi * k / 3)
+    cardano: np.ndarray = np.stack(
+        [u + v + 0j, -(u + v) / 2 + 1j * np.sqrt(3) / 2 * (u - v), -(u + v) / 2 - 1j * np.sqrt(3) / 2 * (u - v)],
+        axis=-1,
+    )
+    roots: np.ndarray = np.where(one[..., None], cardano, trig) - (b / 3)[..., None]
+    return _finish(coeffs, roots, imag_tol)
+
+
+def _monic_quadratic(b: np.ndarray, c: np.ndarray) -> np.ndarray:
+    """复系数方程 y^2 + by + c = 0 的两个根, 使用无抵消公式."""
+    sq: np.ndarray = np.sqrt(b * b - 4 * c + 0j)
+    sq = np.where((b.conjugate() * sq).real >= 0, sq, -sq)
+    q: np.ndarray = -(b + sq) / 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.stack([q, np.where(q == 0, 0, c / q)], axis=-1)
+
+
+def quartic_batch(
+    a: np.ndarray,
+    b: np.ndarray,
+    c: np.ndarray,
+    d: np.ndarray,
+    e: np.ndarray,
+    imag_tol: float = 1e-8,
+) -> PolyRoots:
+    r"""批量求一元四次方程 $ax^4 + bx^3 + cx^2 + dx + e = 0$ 的根(费拉里方法).
+
+    代换 $x = y - \frac{b}{4a}$ 化为 $y^4 + py^2 + qy + r = 0$, 取预解三次方程
+    $8m^3 + 8pm^2 + (2p^2 - 8r)m - q^2 = 0$ 的最大实数根 m, 原方程分解为两个二次方程
+    $y^2 \mp \sqrt{2m}y + \frac{p}{2} + m \pm \frac{q}{2\sqrt{2m}} = 0$; q = 0 时直接按双二次方程求解.
+
+    Args:
+        a (np.ndarray): 四次项系数, 不能为 0
+        b (np.ndarray): 三次项系数
+        c (np.ndarray): 二次项系数
+        d (np.ndarray): 一次项系数
+        e (np.ndarray): 常数项系数, 五个系数互相广播
+        imag_tol (float): 可选参数, 虚部相对大小不超过该值的根视为实数根
+
+    Returns:
+        PolyRoots: 每个方程的 4 个根
+
+    """
+    coeffs: np.ndarray = np.stack(np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (a, b, c, d, e))), axis=-1)
+    a = _leading(coeffs[..., 0])
+    b, c, d, e = (coeffs[..., k] / a for k in range(1, 5))
+    p: np.ndarray = c - 3 * b * b / 8
+    q: np.ndarray = d - b * c / 2 + b**3 / 8
+    r: np.ndarray = e - b * d / 4 + b * b * c / 16 - 3 * b**4 / 256
+    resolvent: PolyRoots = cubic_batch(8.0, 8 * p, 2 * p * p - 8 * r, -q * q, imag_tol)
+    # 实数根按升序排在前面, 取最大的一个; q != 0 时它一定为正
+    m: np.ndarray = np.maximum(np.take_along_axis(resolvent.roots.real, resolvent.n_real[..., None] - 1, -1)[..., 0], 0)
+    s: np.ndarray = np.sqrt(2 * m)
+    biquadratic: np.ndarray = s == 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t: np.ndarray = np.where(biquadratic, 0, q / (2 * np.where(biquadratic, 1, s)))
+    left: np.ndarray = _monic_quadratic(-s + 0j, p / 2 + m + t + 0j)
+    right: np.ndarray = _monic_quadratic(s + 0j, p / 2 + m - t + 0j)
+    z: np.ndarray = np.sqrt(_monic_quadratic(p + 0j, r + 0j))
+    bi: np.ndarray = np.concatenate([z, -z], axis=-1)
+    roots: np.ndarray = np.where(biquadratic[..., None], bi, np.concatenate([left, right], axis=-1))
+    return _finish(coeffs, roots - (b / 4)[..., None], imag_tol)
+
+
+def polyroots_batch(coeffs: np.ndarray, imag_tol: float = 1e-8, *, closed_form: bool = True) -> PolyRoots:
+    """批量求一元 n 次方程的根.
+
+    二至四次方程默认使用闭式解(quadratic_batch, cubic_batch, quartic_batch),
+    其余次数构造每个方程的友矩阵, 用 np.linalg.eigvals 一次性求出整批特征值作为根.
+
+    Args:
+        coeffs (np.ndarray): 系数数组, 形状为 (..., n + 1), 最后一维从最高次项到常数项排列, 首项系数不能为 0
+        imag_tol (float): 可选参数, 虚部相对大小不超过该值的根视为实数根
+        closed_form (bool): 可选参数, 为 False 时二至四次方程也使用友矩阵求解
+
+    Returns:
+        PolyRoots: 每个方程的 n 个根
+
+    """
+    coeffs = np.asarray(coeffs, dtype=float)
+    n: int = coeffs.shape[-1] - 1
+    if n < 1:
+        err_msg: str = "多项式的次数至少为 1"
+        raise ValueError(err_msg)
+    _leading(coeffs[..., 0])
+    if closed_form and n == 2:  # noqa: PLR2004
+        return quadratic_batch(*np.moveaxis(coeffs, -1, 0))
+    if closed_form and n == 3:  # noqa: PLR2004
+        return cubic_batch(*np.moveaxis(coeffs, -1, 0), imag_tol)
+    if closed_form and n == 4:  # noqa: PLR2004
+        return quartic_batch(*np.moveaxis(coeffs, -1, 0), imag_tol)
+    companion: np.ndarray = np.zeros((*coeffs.shape[:-1], n, n))
+    companion[..., 0, :] = -coeffs[..., 1:] / coeffs[..., :1]
+    companion[..., np.arange(1, n), np.arange(n - 1)] = 1
+    return _finish(coeffs, np.linalg.eigvals(companion).astype(complex), imag_tol, polish=1)
+
+
+def test_polyroots_batch() -> None:
+    """quadratic_batch()等批量求根函数的测试函数."""
+    # b^2 >> 4ac 时教科书公式求得的小根只剩 0 或很少的有效数字
+    res: PolyRoots = quadratic_batch(1.0, 1e8, 1.0)
+    assert math.isclose(res.roots[0].real, -1e8) and math.isclose(res.roots[1].real, -1e-8, rel_tol=1e-15), (
+        "无抵消公式应精确求出小根"
+    )
+    assert quadratic_formula(1.0, 1e8, 1.0)[0] == res.roots[1].real, "quadratic_formula() 应使用相同的稳定公式"
+
+    res = quadratic_batch([1, 1, 1], [-3, 2, 0], [2, 1, 1])
+    assert res.n_real.tolist() == [2, 2, 0], "实数根个数错误"
+    assert np.allclose(res.roots, [[1, 2], [-1, -1], [1j, -1j]]), "二次方程的根错误"
+    assert np.isnan(res.real[2]).all(), "复数根在 real 中应为 NaN"
+
+    rng: np.random.Generator = np.random.default_rng(0)
+    for degree in (3, 4, 6):
+        coeffs: np.ndarray = rng.normal(size=(200, degree + 1))
+        batch: PolyRoots = polyroots_batch(coeffs)
+        for row, roots in zip(coeffs, batch.roots, strict=True):
+            expected: np.ndarray = np.roots(row)
+            dist: np.ndarray = np.abs(roots[:, None] - expected[None, :])
+            assert max(dist.min(axis=0).max(), dist.min(axis=1).max()) < 1e-6, f"{degree} 次方程的根错误"
+        assert (batch.n_real == np.sum(np.isreal(batch.roots), axis=-1)).all(), "实数根应排在前面"
+        companion: PolyRoots = polyroots_batch(coeffs, closed_form=False)
+        assert (companion.n_real == batch.n_real).all(), "闭式解与友矩阵的实数根个数不一致"
+
+    # 重根
+    assert np.allclose(cubic_batch(1, -3, 3, -1).roots, 1, atol=1e-5), "三重根 1"
+    assert np.allclose(quartic_batch(1, 0, -5, 0, 4).roots, [-2, -1, 1, 2]), "双二次方程 x^4 - 5x^2 + 4"
+    assert quartic_batch(1, -10, 35, -50, 24).n_real == 4, "(x-1)(x-2)(x-3)(x-4) 有 4 个实数根"
+    with pytest.raises(ValueError, match="首项系数不能为 0"):
+        cubic_batch(0, 1, 1, 1)
+
+
 def main() -> None:
     """Entry function."""
 
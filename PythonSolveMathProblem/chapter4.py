@@ -1,7 +1,19 @@
 """《Python玩转数学问题》Chapter 4 循环."""
 
+import itertools
 import math
-from collections.abc import Callable
+import mmap
+import os
+from collections import Counter
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from functools import lru_cache
+from multiprocessing import shared_memory
+from typing import ClassVar
+
+import numpy as np
+import pytest
 
 
 def bisection(f: Callable, x1: float, x2: float, tol: float = 1e-6) -> float | None:
@@ -17,32 +29,416 @@ def bisection(f: Callable, x1: float, x2: float, tol: float = 1e-6) -> float | N
         float | None: 方程 f = 0 的近似解
 
     """
-    if f(x1) * f(x2) > 0:
+    f1: float = f(x1)
+    if f1 * f(x2) > 0:
         print(f"区间[{x1}, {x2}]内不一定有解!")
         return None
     m: float = (x1 + x2) / 2
-    while abs(f(m)) > tol:
-        if f(x1) * f(m) < 0:
+    fm: float = f(m)  # 每轮只计算一次 f(m), 并缓存区间下界的函数值
+    while abs(fm) > tol:
+        if f1 * fm < 0:
             x2: float = m
         else:
             x1: float = m
+            f1 = fm
         m: float = (x1 + x2) / 2
+        fm = f(m)
     return m
 
 
-def newton_iter(f: Callable, dfdx: Callable, x0: float, tol: float = 1e-6) -> float:
+def bisection_batch(
+    f: Callable,
+    x1: np.ndarray,
+    x2: np.ndarray,
+    tol: float = 1e-6,
+    max_iter: int = 200,
+    xtol: float = 0.0,
+    rtol: float = 0.0,
+) -> np.ndarray:
+    """对一组区间同时使用二分法求方程近似解.
+
+    所有区间同步推进, 每轮只对尚未收敛的区间计算一次 f(m), 已收敛的区间被屏蔽.
+    中点 m 与某个端点相等时区间已缩小到相邻的两个浮点数, 无法再二分, 也视为收敛.
+
+    Args:
+        f (Callable): 待解方程的函数, 必须支持 NumPy 数组输入(逐元素计算)
+        x1 (np.ndarray): 各区间的下界
+        x2 (np.ndarray): 各区间的上界, 与 x1 广播
+        tol (float): 可选参数, 近似解的公差值, 默认为 1e-6
+        max_iter (int): 可选参数, 最大迭代次数
+        xtol (float): 可选参数, 区间宽度不超过 xtol + rtol * |m| 时也视为收敛, 默认为 0
+        rtol (float): 可选参数, 区间宽度的相对公差, 默认为 0
+
+    Returns:
+        np.ndarray: 各区间内方程 f = 0 的近似解; 端点同号或达到最大迭代次数仍未收敛的区间为 NaN
+
+    """
+    lo, hi = np.broadcast_arrays(np.asarray(x1, dtype=float), np.asarray(x2, dtype=float))
+    shape: tuple[int, ...] = lo.shape
+    lo, hi = lo.ravel().copy(), hi.ravel().copy()
+    f_lo: np.ndarray = np.asarray(f(lo), dtype=float)
+    f_hi: np.ndarray = np.asarray(f(hi), dtype=float)
+    root: np.ndarray = np.full(lo.shape, np.nan)
+    # 端点恰好为根时直接记录, 只对端点严格异号的区间迭代
+    root[f_hi == 0] = hi[f_hi == 0]
+    root[f_lo == 0] = lo[f_lo == 0]
+    # 只保留尚未收敛的区间, 每轮按收敛掩码压缩
+    idx: np.ndarray = np.flatnonzero(f_lo * f_hi < 0)
+    lo, hi, f_lo, f_hi = lo[idx], hi[idx], f_lo[idx], f_hi[idx]
+    for _ in range(max_iter):
+        if not idx.size:
+            break
+        m: np.ndarray = (lo + hi) / 2
+        fm: np.ndarray = np.asarray(f(m), dtype=float)
+        # lo 与 hi 已是相邻的浮点数, 取 |f| 较小的端点
+        stuck: np.ndarray = (m == lo) | (m == hi)
+        m = np.where(stuck, np.where(np.abs(f_lo) <= np.abs(f_hi), lo, hi), m)
+        left: np.ndarray = f_lo * fm < 0
+        hi = np.where(left, m, hi)
+        lo = np.where(left, lo, m)
+        f_hi = np.where(left, fm, f_hi)
+        f_lo = np.where(left, f_lo, fm)
+        done: np.ndarray = (np.abs(fm) <= tol) | (hi - lo <= xtol + rtol * np.abs(m)) | stuck
+        if done.any():
+            root[idx[done]] = m[done]
+            keep: np.ndarray = ~done
+            idx, lo, hi, f_lo, f_hi = idx[keep], lo[keep], hi[keep], f_lo[keep], f_hi[keep]
+    return root.reshape(shape)
+
+
+def test_bisection() -> None:
+    """bisection()与bisection_batch()的测试函数."""
+
+    def f(x: float) -> float:
+        return x**2 - 4 * x + math.exp(-x)
+
+    sol: float | None = bisection(f, -0.5, 1)
+    assert sol is not None, "区间 [-0.5, 1] 内有解"
+    assert abs(f(sol)) <= 1e-6, "二分法求得的近似解误差过大"
+
+    calls: list[int] = []
+
+    def g(x: np.ndarray) -> np.ndarray:
+        calls.append(len(x))
+        return x**2 - 2
+
+    roots: np.ndarray = bisection_batch(g, np.zeros(1000), np.linspace(1, 100, 1000), tol=1e-9)
+    assert np.isnan(roots[:5]).all(), "上界小于 sqrt(2) 的区间内无解, 应为 NaN"
+    assert np.allclose(roots[5:], math.sqrt(2), atol=1e-9), "批量二分法求 sqrt(2) 错误"
+    assert calls[2] == 995, "每轮只对有解的区间计算一次 f"
+    assert calls[2:] == sorted(calls[2:], reverse=True), "已收敛的区间不应再计算 f"
+    edge: np.ndarray = bisection_batch(lambda x: x, np.array([0.0, -1.0, 1.0]), np.array([1.0, 0.0, 2.0]))
+    assert np.array_equal(edge[:2], [0.0, 0.0]), "端点恰好为根时应返回该端点"
+    assert np.isnan(edge[2]), "端点同号的区间应为 NaN"
+    ex: np.ndarray = bisection_batch(lambda x: x**2 - 4 * x + np.exp(-x), -0.5, 1.0)
+    assert math.isclose(float(ex), sol, abs_tol=1e-6), "批量二分法与二分法的结果不一致"
+
+
+def find_roots(
+    f: Callable,
+    a: float,
+    b: float,
+    num: int = 1000,
+    *,
+    tol: float = 1e-12,
+    xtol: float = 1e-12,
+    rtol: float = 4 * np.finfo(float).eps,
+    max_depth: int = 12,
+    refine: int = 8,
+) -> np.ndarray:
+    """求区间 [a, b] 内方程 f(x) = 0 的所有实根.
+
+    先在 num 等分的网格上一次性计算 f, 对 |f| 的局部极小点用过三点的抛物线估计极小值,
+    若估计值与网格值异号(可能藏着一对相距很近的根), 就只把该点两侧的网格再细分 refine 份, 最多细分 max_depth 轮.
+    最后把所有变号区间交给 bisection_batch() 同时求解, 二分到相邻浮点数为止, 因此 |x| 很大时也不会丢根;
+    网格上 |f| <= tol 的点直接作为根, 结果排序去重.
+    间断点(如 tan 的极点)两侧变号但不是根, 求得点处 |f| 比区间端点还大的结果会被舍弃.
+
+    Args:
+        f (Callable): 待解方程的函数, 必须支持 NumPy 数组输入(逐元素计算)
+        a (float): 区间下界
+        b (float): 区间上界
+        num (int): 可选参数, 初始网格的等分数
+        tol (float): 可选参数, 近似解处 |f| 的公差值
+        xtol (float): 可选参数, 根的位置公差, 相距不超过 xtol + rtol * |x| 的根视为同一个
+        rtol (float): 可选参数, 根的位置相对公差
+        max_depth (int): 可选参数, 自适应细分的最大轮数, 为 0 时只使用初始网格
+        refine (int): 可选参数, 每轮细分时每个网格区间被等分的份数
+
+    Returns:
+        np.ndarray: 按升序排列的所有近似根
+
+    """
+    if not a < b:
+        err_msg: str = f"区间[{a}, {b}]无效, 必须 a < b"
+        raise ValueError(err_msg)
+    x: np.ndarray = np.linspace(a, b, num + 1)
+    y: np.ndarray = np.asarray(f(x), dtype=float)
+    t: np.ndarray = np.arange(1, refine) / refine
+    for _ in range(max_depth):
+        x0, x1, x2 = x[:-2], x[1:-1], x[2:]
+        y0, y1, y2 = y[:-2], y[1:-1], y[2:]
+        # 两侧同号且 |f| 取局部极小
+        cand: np.ndarray = (y0 * y1 > 0) & (y1 * y2 > 0) & (np.abs(y1) <= np.abs(y0)) & (np.abs(y1) <= np.abs(y2))
+        cand &= x2 - x0 > 4 * (xtol + rtol * np.abs(x1))
+        idx: np.ndarray = np.flatnonzero(cand)
+        if not idx.size:
+            break
+        # 抛物线 p(x) = y0 + d1·(x - x0) + c·(x - x0)(x - x1) 的顶点值
+        d1: np.ndarray = (y1[idx] - y0[idx]) / (x1[idx] - x0[idx])
+        d2: np.ndarray = (y2[idx] - y1[idx]) / (x2[idx] - x1[idx])
+        c: np.ndarray = (d2 - d1) / (x2[idx] - x0[idx])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            xv: np.ndarray = (x0[idx] + x1[idx]) / 2 - d1 / (2 * c)
+            yv: np.ndarray = y0[idx] + d1 * (xv - x0[idx]) + c * (xv - x0[idx]) * (xv - x1[idx])
+        idx = idx[(c != 0) & (yv * y1[idx] <= 0)]
+        if not idx.size:
+            break
+        left: np.ndarray = x0[idx, None] + t * (x1[idx] - x0[idx])[:, None]
+        right: np.ndarray = x1[idx, None] + t * (x2[idx] - x1[idx])[:, None]
+        new_x: np.ndarray = np.setdiff1d(np.concatenate([left.ravel(), right.ravel()]), x)
+        new_y: np.ndarray = np.asarray(f(new_x), dtype=float)
+        order: np.ndarray = np.argsort(np.concatenate([x, new_x]), kind="stable")
+        x, y = np.concatenate([x, new_x])[order], np.concatenate([y, new_y])[order]
+
+    near: np.ndarray = np.abs(y) <= tol
+    exact: np.ndarray = x[near]
+    br: np.ndarray = np.flatnonzero((y[:-1] * y[1:] < 0) & ~near[:-1] & ~near[1:])
+    # 最多 2200 次二分即可把任意有限区间缩小到相邻的两个浮点数, 每个变号区间都一定得到一个结果
+    roots: np.ndarray = bisection_batch(f, x[br], x[br + 1], tol=tol, max_iter=2200, xtol=xtol, rtol=rtol)
+    f_roots: np.ndarray = np.abs(np.asarray(f(roots), dtype=float))
+    roots = roots[f_roots <= np.maximum(tol, np.minimum(np.abs(y[br]), np.abs(y[br + 1])))]
+    roots = np.sort(np.concatenate([exact, roots]))
+    if roots.size:
+        roots = roots[np.concatenate([[True], np.diff(roots) > xtol + rtol * np.abs(roots[1:])])]
+    return roots
+
+
+def test_find_roots() -> None:
+    """find_roots()的测试函数."""
+    roots: np.ndarray = find_roots(np.sin, 0, 20, num=100)
+    assert np.allclose(roots, np.pi * np.arange(7), atol=1e-10), "应求出 [0, 20] 内 sin 的全部 7 个根"
+
+    calls: list[int] = []
+
+    def g(x: np.ndarray) -> np.ndarray:
+        calls.append(np.size(x))
+        return (x - 0.5003) * (x - 0.5008)
+
+    close: np.ndarray = find_roots(g, 0, 1, num=10)
+    assert np.allclose(close, [0.5003, 0.5008], atol=1e-10), "自适应细分应找到相距很近的两个根"
+    assert calls[0] + sum(calls[1:-1]) < 200, "只应在可疑区间附近细分网格"
+    assert find_roots(g, 0, 1, num=10, max_depth=0).size == 0, "不细分时粗网格看不到这对根"
+
+    assert np.allclose(find_roots(np.tan, 0.1, 3.5), [np.pi]), "tan 的极点不是根"
+    assert find_roots(lambda x: x**2 + 1, -1, 1).size == 0, "无实根时应返回空数组"
+
+    far: np.ndarray = find_roots(np.sin, 1e5, 1e5 + 10)
+    assert np.allclose(far, np.pi * np.arange(31831, 31835), rtol=1e-15, atol=0), "|x| 很大时也应求出全部根"
+    assert np.allclose(find_roots(lambda x: 3 * (x - 1e6 - 0.3), 0, 2e6), [1e6 + 0.3], rtol=1e-15, atol=0), (
+        "|x| 很大时也应求出全部根"
+    )
+    assert np.allclose(find_roots(np.sin, 1, np.pi), [np.pi]), "|f| <= tol 的端点应作为根"
+    assert find_roots(np.sin, 1e15, 1e15 + 10).size == 3, "浮点数间距大于 1 时也不应丢根"
+
+
+class Dual:
+    """前向模式自动微分的对偶数 a + b·ε (ε^2 = 0).
+
+    用 Dual(x, 1.0) 代替 x 对函数求值, 结果的 val 为 f(x), der 为 f'(x), 只需一次求值.
+    支持四则运算、乘方以及 np.exp, np.sin 等 NumPy ufunc; val 和 der 也可以是 NumPy 数组.
+    math 模块的函数只接受浮点数, 无法传递导数, 需要改用对应的 NumPy 函数.
+
+    Attributes:
+        val (float | np.ndarray): 函数值部分
+        der (float | np.ndarray): 导数部分
+
+    """
+
+    # 一元 ufunc 的导数规则: (函数值, 导数值)
+    _UNARY_RULES: ClassVar[dict[np.ufunc, Callable]] = {
+        np.negative: lambda v, d: (-v, -d),
+        np.positive: lambda v, d: (v, d),
+        np.absolute: lambda v, d: (np.abs(v), np.sign(v) * d),
+        np.square: lambda v, d: (v * v, 2 * v * d),
+        np.reciprocal: lambda v, d: (1 / v, -d / (v * v)),
+        np.sqrt: lambda v, d: (np.sqrt(v), d / (2 * np.sqrt(v))),
+        np.cbrt: lambda v, d: (np.cbrt(v), d / (3 * np.cbrt(v) ** 2)),
+        np.exp: lambda v, d: (np.exp(v), np.exp(v) * d),
+        np.expm1: lambda v, d: (np.expm1(v), np.exp(v) * d),
+        np.exp2: lambda v, d: (np.exp2(v), np.exp2(v) * np.log(2) * d),
+        np.log: lambda v, d: (np.log(v), d / v),
+        np.log2: lambda v, d: (np.log2(v), d / (v * np.log(2))),
+        np.log10: lambda v, d: (np.log10(v), d / (v * np.log(10))),
+        np.log1p: lambda v, d: (np.log1p(v), d / (1 + v)),
+        np.sin: lambda v, d: (np.sin(v), np.cos(v) * d),
+        np.cos: lambda v, d: (np.cos(v), -np.sin(v) * d),
+        np.tan: lambda v, d: (np.tan(v), d / np.cos(v) ** 2),
+        np.arcsin: lambda v, d: (np.arcsin(v), d / np.sqrt(1 - v * v)),
+        np.arccos: lambda v, d: (np.arccos(v), -d / np.sqrt(1 - v * v)),
+        np.arctan: lambda v, d: (np.arctan(v), d / (1 + v * v)),
+        np.sinh: lambda v, d: (np.sinh(v), np.cosh(v) * d),
+        np.cosh: lambda v, d: (np.cosh(v), np.sinh(v) * d),
+        np.tanh: lambda v, d: (np.tanh(v), d / np.cosh(v) ** 2),
+    }
+
+    def __init__(self, val: float | np.ndarray, der: float | np.ndarray = 0.0) -> None:
+        """初始化对偶数."""
+        self.val: float | np.ndarray = val
+        self.der: float | np.ndarray = der
+
+    @staticmethod
+    def _split(x: "Dual | float | np.ndarray") -> tuple[float | np.ndarray, float | np.ndarray]:
+        """拆分为 (函数值, 导数值), 普通数值的导数为 0."""
+        return (x.val, x.der) if isinstance(x, Dual) else (x, 0.0)
+
+    def __add__(self, other: "Dual | float") -> "Dual":
+        """加法."""
+        v, d = self._split(other)
+        return Dual(self.val + v, self.der + d)
+
+    __radd__ = __add__
+
+    def __sub__(self, other: "Dual | float") -> "Dual":
+        """减法."""
+        v, d = self._split(other)
+        return Dual(self.val - v, self.der - d)
+
+    def __rsub__(self, other: "Dual | float") -> "Dual":
+        """反向减法."""
+        return Dual(other - self.val, -self.der)
+
+    def __mul__(self, other: "Dual | float") -> "Dual":
+        """乘法."""
+        v, d = self._split(other)
+        return Dual(self.val * v, self.der * v + self.val * d)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other: "Dual | float") -> "Dual":
+        """除法."""
+        v, d = self._split(other)
+        return Dual(self.val / v, (self.der * v - self.val * d) / (v * v))
+
+    def __rtruediv__(self, other: "Dual | float") -> "Dual":
+        """反向除法."""
+        return Dual(other / self.val, -other * self.der / (self.val * self.val))
+
+    def __pow__(self, other: "Dual | float") -> "Dual":
+        """乘方, 指数为常数时不需要对底数取对数, 底数可以为负."""
+        v, d = self._split(other)
+        if isinstance(other, Dual):
+            value = self.val**v
+            return Dual(value, value * (d * np.log(self.val) + v * self.der / self.val))
+        return Dual(self.val**v, v * self.val ** (v - 1) * self.der)
+
+    def __rpow__(self, other: float) -> "Dual":
+        """常数的对偶数次幂."""
+        value = other**self.val
+        return Dual(value, value * np.log(other) * self.der)
+
+    def __neg__(self) -> "Dual":
+        """取负."""
+        return Dual(-self.val, -self.der)
+
+    def __pos__(self) -> "Dual":
+        """取正."""
+        return self
+
+    def __abs__(self) -> "Dual":
+        """绝对值."""
+        return Dual(abs(self.val), np.sign(self.val) * self.der)
+
+    # 比较运算只比较函数值, 使 max, 条件分支等写法可以正常使用
+    def __eq__(self, other: object) -> bool:
+        """等于."""
+        return self.val == self._split(other)[0]
+
+    def __ne__(self, other: object) -> bool:
+        """不等于."""
+        return self.val != self._split(other)[0]
+
+    # 定义了按值比较的 __eq__, 不能再按对象标识求哈希
+    __hash__ = None  # type: ignore[assignment]
+
+    def __lt__(self, other: "Dual | float") -> bool:
+        """小于."""
+        return self.val < self._split(other)[0]
+
+    def __le__(self, other: "Dual | float") -> bool:
+        """小于等于."""
+        return self.val <= self._split(other)[0]
+
+    def __gt__(self, other: "Dual | float") -> bool:
+        """大于."""
+        return self.val > self._split(other)[0]
+
+    def __ge__(self, other: "Dual | float") -> bool:
+        """大于等于."""
+        return self.val >= self._split(other)[0]
+
+    def __repr__(self) -> str:
+        """对偶数的字符串表示."""
+        return f"Dual({self.val!r}, {self.der!r})"
+
+    def __array_ufunc__(self, ufunc: np.ufunc, method: str, *inputs: object, **kwargs: object) -> "Dual":
+        """使 np.exp, np.sin 等 ufunc 以及 NumPy 标量与对偶数的运算可以传递导数."""
+        if method != "__call__" or kwargs:
+            return NotImplemented
+        if len(inputs) == 1 and ufunc in self._UNARY_RULES:
+            return Dual(*self._UNARY_RULES[ufunc](self.val, self.der))
+        binary: dict[np.ufunc, Callable] = {
+            np.add: lambda a, b: a + b,
+            np.subtract: lambda a, b: a - b,
+            np.multiply: lambda a, b: a * b,
+            np.true_divide: lambda a, b: a / b,
+            np.power: lambda a, b: a**b,
+        }
+        if len(inputs) == 2 and ufunc in binary:
+            a, b = inputs
+            # 左操作数是普通数值时提升为导数为 0 的对偶数, 右操作数保持原样以便常数指数走快速路径
+            return binary[ufunc](a if isinstance(a, Dual) else Dual(a), b)
+        return NotImplemented
+
+
+def _dual_eval(f: Callable, x: float | np.ndarray, *args: object) -> tuple[float | np.ndarray, float | np.ndarray]:
+    """以 Dual(x, 1) 对 f 求值一次, 返回 (f(x), f'(x))."""
+    try:
+        y: Dual | float = f(Dual(x, np.ones_like(x, dtype=float) if isinstance(x, np.ndarray) else 1.0), *args)
+    except TypeError as exc:
+        err_msg: str = "无法对 f 自动求导: math 模块的函数只接受浮点数, 请改用对应的 NumPy 函数或显式提供 dfdx"
+        raise TypeError(err_msg) from exc
+    if isinstance(y, Dual):
+        return y.val, y.der
+    return y, np.zeros_like(y, dtype=float) if isinstance(y, np.ndarray) else 0.0
+
+
+def derivative(f: Callable) -> Callable:
+    """返回 f 的导函数, 由自动微分逐点精确求得."""
+    return lambda x: _dual_eval(f, x)[1]
+
+
+def newton_iter(f: Callable, dfdx: Callable | None = None, x0: float = 0.0, tol: float = 1e-6) -> float:
     """使用牛顿迭代法求方程近似解.
 
+    未提供导函数时使用对偶数自动微分, 每步只需对 f 求值一次即可同时得到 f 与 f'.
+
     Args:
         f (function): 待解方程的函数
-        dfdx (function): 待解方程的导函数
-        x0 (float): 求近似解的迭代起点
+        dfdx (function | None): 可选参数, 待解方程的导函数, 默认自动微分
+        x0 (float): 求近似解的迭代起点, 默认为 0
         tol (float): 可选参数, 近似解的公差值, 默认为 1e-6
 
     Returns:
         float: 方程 f = 0 的近似解
 
     """
+    if dfdx is None:
+        f0, d0 = _dual_eval(f, x0)
+        while abs(f0) > tol:
+            x0 = x0 - f0 / d0
+            f0, d0 = _dual_eval(f, x0)
+        return x0
     f0: float = f(x0)
     while abs(f0) > tol:
         x1: float = x0 - f0 / dfdx(x0)
@@ -51,10 +447,686 @@ def newton_iter(f: Callable, dfdx: Callable, x0: float, tol: float = 1e-6) -> fl
     return x0
 
 
+def test_newton_iter() -> None:
+    """newton_iter()与自动微分的测试函数."""
+    sol: float = newton_iter(lambda x: x**2 - 4 * x + math.exp(-x), lambda x: 2 * x - 4 - math.exp(-x), 0)
+    auto: float = newton_iter(lambda x: x**2 - 4 * x + np.exp(-x), x0=0)
+    assert math.isclose(sol, auto), "自动微分与手写导函数的牛顿迭代结果不一致"
+
+    calls: list[float] = []
+
+    def g(x: Dual) -> Dual:
+        calls.append(1)
+        return x**3 - 2
+
+    assert math.isclose(newton_iter(g, x0=1, tol=1e-12), 2 ** (1 / 3)), "x^3 = 2 的解计算错误"
+    assert len(calls) <= 7, "自动微分每步只应对 f 求值一次"
+
+    x: float = 0.7
+    checks: list[tuple[Callable, float]] = [
+        (
+            lambda t: np.sin(t) * np.exp(t) / (1 + t**2),
+            math.cos(x) * math.exp(x) / (1 + x**2)
+            + math.sin(x) * math.exp(x) / (1 + x**2)
+            - 2 * x * math.sin(x) * math.exp(x) / (1 + x**2) ** 2,
+        ),
+        (
+            lambda t: 2**t + t**t + np.sqrt(t) - 1 / t,
+            math.log(2) * 2**x + x**x * (math.log(x) + 1) + 0.5 / math.sqrt(x) + 1 / x**2,
+        ),
+        (lambda t: np.float64(3.0) * np.arctan(t) - np.log(t), 3 / (1 + x**2) - 1 / x),
+    ]
+    for fn, expected in checks:
+        assert math.isclose(derivative(fn)(x), expected), "自动微分求得的导数错误"
+    assert np.allclose(derivative(np.tanh)(np.array([0.0, 1.0])), 1 / np.cosh([0.0, 1.0]) ** 2), "数组导数错误"
+    with pytest.raises(TypeError, match="无法对 f 自动求导"):
+        newton_iter(lambda t: math.exp(t) - 2, x0=0)
+
+    def sinc(t: Dual) -> Dual | float:
+        return 1.0 if t == 0 else np.sin(t) / t
+
+    assert derivative(sinc)(0.0) == 0.0, "条件分支 t == 0 应按函数值比较"
+    assert math.isclose(derivative(sinc)(x), (math.cos(x) * x - math.sin(x)) / x**2), "sinc 的导数错误"
+    assert Dual(1.0, 2.0) == 1.0 and Dual(1.0, 2.0) != Dual(2.0, 2.0), "对偶数的相等比较只比较函数值"
+    with pytest.raises(TypeError, match="unhashable"):
+        hash(Dual(1.0, 2.0))
+
+
+@dataclass(frozen=True)
+class NewtonBatchResult:
+    """批量牛顿迭代的结果.
+
+    Attributes:
+        root (np.ndarray): 各问题的近似解, 未收敛的问题为最后一次迭代值
+        converged (np.ndarray): 各问题是否满足 |f| <= tol
+        iterations (np.ndarray): 各问题实际执行的牛顿步数
+
+    """
+
+    root: np.ndarray
+    converged: np.ndarray
+    iterations: np.ndarray
+
+
+def newton_iter_batch(
+    f: Callable,
+    dfdx: Callable | None = None,
+    x0: np.ndarray | float = 0.0,
+    params: tuple[np.ndarray, ...] = (),
+    tol: float = 1e-6,
+    max_iter: int = 50,
+) -> NewtonBatchResult:
+    """对一组起点和参数同时使用牛顿迭代法求方程近似解.
+
+    x0 与 params 中的数组相互广播, 每个元素对应一个独立问题 f(x, *params) = 0.
+    所有问题同步迭代, 每轮只对尚未收敛的问题求值; 导数为 0 或出现非有限值的问题提前停止,
+    达到 max_iter 仍未收敛的问题也停止, 都在结果的 converged 中标记为 False, 不会无限循环.
+
+    Args:
+        f (Callable): 待解方程的函数 f(x, *params), 必须支持 NumPy 数组输入
+        dfdx (Callable | None): 可选参数, 导函数 dfdx(x, *params), 默认使用对偶数自动微分
+        x0 (np.ndarray | float): 迭代起点
+        params (tuple[np.ndarray, ...]): 可选参数, 与 x0 广播的参数数组
+        tol (float): 可选参数, 近似解的公差值, 默认为 1e-6
+        max_iter (int): 可选参数, 最大迭代次数
+
+    Returns:
+        NewtonBatchResult: 近似解、收敛掩码与迭代次数, 形状与广播后的 x0 相同
+
+    """
+    arrays: list[np.ndarray] = np.broadcast_arrays(np.asarray(x0, dtype=float), *map(np.asarray, params))
+    shape: tuple[int, ...] = arrays[0].shape
+    x: np.ndarray = arrays[0].ravel().copy()
+    args: list[np.ndarray] = [a.ravel() for a in arrays[1:]]
+    converged: np.ndarray = np.zeros(x.shape, dtype=bool)
+    iterations: np.ndarray = np.zeros(x.shape, dtype=np.int64)
+    idx: np.ndarray = np.arange(x.size)
+    for k in range(max_iter + 1):
+        xa: np.ndarray = x[idx]
+        pa: list[np.ndarray] = [a[idx] for a in args]
+        if dfdx is None:
+            fa, da = _dual_eval(f, xa, *pa)
+        else:
+            fa, da = f(xa, *pa), dfdx(xa, *pa)
+        fa, da = np.broadcast_to(fa, xa.shape), np.broadcast_to(da, xa.shape)
+        done: np.ndarray = np.abs(fa) <= tol
+        converged[idx[done]] = True
+        # 已收敛、导数为 0 或数值溢出的问题不再迭代
+        keep: np.ndarray = ~done & (da != 0) & np.isfinite(fa) & np.isfinite(da)
+        if k == max_iter or not keep.any():
+            break
+        idx = idx[keep]
+        x[idx] = xa[keep] - fa[keep] / da[keep]
+        iterations[idx] += 1
+    return NewtonBatchResult(x.reshape(shape), converged.reshape(shape), iterations.reshape(shape))
+
+
+def test_newton_iter_batch() -> None:
+    """newton_iter_batch()的测试函数."""
+    c: np.ndarray = np.linspace(1, 100, 10_000)
+    result: NewtonBatchResult = newton_iter_batch(lambda x, c: x**2 - c, lambda x, _: 2 * x, 1.0, (c,), tol=1e-10)
+    assert result.converged.all(), "x^2 = c 应全部收敛"
+    assert np.allclose(result.root, np.sqrt(c)), "x^2 = c 的解计算错误"
+    auto: NewtonBatchResult = newton_iter_batch(lambda x, c: x**3 - c, x0=np.ones(3), params=(np.array([1, 8, 27]),))
+    assert np.allclose(auto.root, [1, 2, 3], atol=1e-6), "自动微分的批量牛顿迭代结果错误"
+    assert auto.iterations[0] == 0, "起点即为解时不应迭代"
+
+    # x^2 + 1 = 0 无实数解, 起点 0 处导数为 0
+    hard: NewtonBatchResult = newton_iter_batch(lambda x: x**2 + 1, x0=np.array([0.0, 0.5, 2.0]), max_iter=20)
+    assert not hard.converged.any(), "无解的方程应标记为未收敛"
+    assert hard.iterations[0] == 0, "导数为 0 的问题应立即停止"
+    assert (hard.iterations[1:] == 20).all(), "未收敛的问题应在达到最大迭代次数后停止"
+
+
+@dataclass(frozen=True)
+class SystemResult:
+    """非线性方程组求解的结果.
+
+    Attributes:
+        root (np.ndarray): 近似解, 未收敛时为最后一次迭代值
+        converged (bool): 是否满足 max|f| <= tol
+        iterations (int): 迭代步数
+        evaluations (int): f 的求值点数(批量计算雅可比矩阵时按点数计)
+        jacobians (int): 计算雅可比矩阵并求逆的次数
+
+    """
+
+    root: np.ndarray
+    converged: bool
+    iterations: int
+    evaluations: int
+    jacobians: int
+
+
+# Broyden 更新后残差下降不到这个比例时, 下一步重新计算雅可比矩阵
+_BROYDEN_REFRESH_RATIO: float = 0.5
+
+
+def newton_system(
+    f: Callable,
+    x0: np.ndarray,
+    jac: Callable | None = None,
+    tol: float = 1e-6,
+    *,
+    max_iter: int = 100,
+    vectorized: bool = False,
+) -> SystemResult:
+    r"""使用牛顿-Broyden 法求非线性方程组 f(x) = 0 的近似解.
+
+    只在开始和收敛变慢时计算雅可比矩阵 J 并求逆(O(n^3)), 其余迭代用 Broyden 秩一更新
+    $J^{-1} \leftarrow J^{-1} + \frac{(s - J^{-1}y)s^TJ^{-1}}{s^TJ^{-1}y}$ (Sherman-Morrison 公式) 直接修正逆矩阵,
+    每步只需一次 f 求值和 O(n^2) 的矩阵向量运算.
+    一步之后残差没有下降时回到当前点重新计算雅可比矩阵, 新雅可比矩阵给出的步长仍不下降则逐次减半.
+
+    Args:
+        f (Callable): 待解方程组的函数, 入参与返回值均为长度为 n 的数组
+        x0 (np.ndarray): 迭代起点
+        jac (Callable | None): 可选参数, 雅可比矩阵函数, 返回 (n, n) 数组, 默认使用前向差分
+        tol (float): 可选参数, 近似解的公差值, 默认为 1e-6
+        max_iter (int): 可选参数, 最大迭代次数
+        vectorized (bool): 可选参数, f 是否支持形状为 (m, n) 的点集(按 x[..., i] 取分量),
+            是则差分雅可比矩阵的 n 个点一次求值, 否则逐点求值
+
+    Returns:
+        SystemResult: 近似解及迭代信息
+
+    """
+    x: np.ndarray = np.array(x0, dtype=float)
+    n: int = x.size
+    fx: np.ndarray = np.asarray(f(x), dtype=float)
+    evaluations: int = 1
+    jacobians: int = 0
+
+    def inverse_jacobian() -> np.ndarray:
+        nonlocal evaluations, jacobians
+        jacobians += 1
+        if jac is not None:
+            j: np.ndarray = np.asarray(jac(x), dtype=float)
+        else:
+            h: np.ndarray = (x + math.sqrt(np.finfo(float).eps) * np.maximum(np.abs(x), 1.0)) - x
+            points: np.ndarray = x + np.diag(h)
+            shifted: np.ndarray = np.asarray(f(points), dtype=float) if vectorized else np.array([f(p) for p in points])
+            evaluations += n
+            j = (shifted - fx).T / h
+        try:
+            return np.linalg.inv(j)
+        except np.linalg.LinAlgError as e:
+            err_msg: str = f"x = {x} 处的雅可比矩阵奇异"
+            raise ValueError(err_msg) from e
+
+    j_inv: np.ndarray = inverse_jacobian()
+    fresh: bool = True
+    norm: float = float(np.abs(fx).max())
+    for k in range(max_iter):
+        if norm <= tol:
+            return SystemResult(x, True, k, evaluations, jacobians)
+        step: np.ndarray = -j_inv @ fx
+        x_new: np.ndarray = x + step
+        f_new: np.ndarray = np.asarray(f(x_new), dtype=float)
+        evaluations += 1
+        norm_new: float = float(np.abs(f_new).max())
+        if not norm_new < norm:
+            if not fresh:
+                j_inv, fresh = inverse_jacobian(), True
+                continue
+            # 新雅可比矩阵的牛顿步仍不下降: 步长减半
+            for _ in range(30):
+                step /= 2
+                x_new = x + step
+                f_new = np.asarray(f(x_new), dtype=float)
+                evaluations += 1
+                norm_new = float(np.abs(f_new).max())
+                if norm_new < norm:
+                    break
+        y: np.ndarray = f_new - fx
+        j_inv_y: np.ndarray = j_inv @ y
+        denom: float = float(step @ j_inv_y)
+        x, fx, stale = x_new, f_new, norm_new > _BROYDEN_REFRESH_RATIO * norm
+        norm = norm_new
+        if stale or denom == 0:
+            j_inv, fresh = inverse_jacobian(), True
+        else:
+            j_inv += np.outer(step - j_inv_y, step @ j_inv) / denom
+            fresh = False
+    return SystemResult(x, norm <= tol, max_iter, evaluations, jacobians)
+
+
+def test_newton_system() -> None:
+    """newton_system()的测试函数."""
+
+    def f(x: np.ndarray) -> np.ndarray:
+        return np.array([x[0] ** 2 + x[1] ** 2 - 4, np.exp(x[0]) + x[1] - 1])
+
+    res: SystemResult = newton_system(f, [1.0, -1.0], tol=1e-12)
+    assert res.converged, "牛顿-Broyden 法应收敛"
+    assert np.abs(f(res.root)).max() <= 1e-12, "方程组的近似解误差过大"
+    exact: SystemResult = newton_system(
+        f,
+        [1.0, -1.0],
+        lambda x: np.array([[2 * x[0], 2 * x[1]], [np.exp(x[0]), 1]]),
+        tol=1e-12,
+    )
+    assert np.allclose(exact.root, res.root), "解析雅可比矩阵与差分雅可比矩阵的结果不一致"
+
+    # Broyden 三对角方程组 (3 - 2x_i)x_i - x_{i-1} - 2x_{i+1} + 1 = 0
+    calls: list[int] = []
+
+    def broyden(x: np.ndarray) -> np.ndarray:
+        calls.append(x.ndim)
+        padded: np.ndarray = np.pad(x, [(0, 0)] * (x.ndim - 1) + [(1, 1)])
+        return (3 - 2 * x) * x - padded[..., :-2] - 2 * padded[..., 2:] + 1
+
+    big: SystemResult = newton_system(broyden, -np.ones(100), tol=1e-10, vectorized=True)
+    assert big.converged, "100 元方程组应收敛"
+    assert np.abs(broyden(big.root)).max() <= 1e-10, "100 元方程组的近似解误差过大"
+    assert calls.count(2) == big.jacobians, "差分雅可比矩阵应一次批量求值"
+    assert big.jacobians < big.iterations, "Broyden 更新应复用雅可比矩阵"
+    with pytest.raises(ValueError, match="雅可比矩阵奇异"):
+        newton_system(lambda x: np.array([x[0] + x[1], x[0] + x[1]]), [1.0, 1.0])
+
+
+@dataclass(frozen=True)
+class ContinuationPoint:
+    """参数延拓得到的一个解.
+
+    Attributes:
+        p (float): 参数值
+        x (float): 该参数下方程 f(x, p) = 0 的解
+        iterations (int): 从上一个输出点走到该点累计的牛顿迭代次数
+        turning_point (bool): 为 True 表示在该点之后检测到转折点, 解支无法继续沿 p 延拓
+
+    """
+
+    p: float
+    x: float
+    iterations: int
+    turning_point: bool = False
+
+
+def _newton_correct(
+    f: Callable,
+    dfdx: Callable | None,
+    x: float,
+    p: float,
+    tol: float,
+    max_iter: int,
+) -> tuple[float, int, bool, float]:
+    """固定参数 p 做牛顿校正, 返回 (解, 迭代次数, 是否收敛, 解处的 f_x)."""
+    for k in range(max_iter + 1):
+        if dfdx is None:
+            fx, dx = _dual_eval(lambda t: f(t, p), x)
+        else:
+            fx, dx = f(x, p), dfdx(x, p)
+        if abs(fx) <= tol:
+            return x, k, True, dx
+        if k == max_iter or dx == 0 or not math.isfinite(fx / dx):
+            break
+        x -= fx / dx
+    return x, k, False, dx
+
+
+def continuation(
+    f: Callable,
+    x0: float,
+    p_values: Iterable[float],
+    *,
+    dfdx: Callable | None = None,
+    dfdp: Callable | None = None,
+    predictor: str = "tangent",
+    tol: float = 1e-10,
+    max_iter: int = 20,
+    min_step: float = 1e-10,
+) -> Iterator[ContinuationPoint]:
+    """沿参数 p 逐个求解 f(x, p) = 0, 每次从上一个解出发预测初值(参数延拓).
+
+    预测: "tangent" 使用切线 dx/dp = -f_p / f_x, "secant" 使用最近两个解的割线外推.
+    校正: 以预测值为起点做牛顿迭代. 校正失败时步长减半重试, 连续快速收敛时步长加倍,
+    因此相邻两个 p 相距较远时会自动插入中间步.
+    f_x 在相邻两个解之间变号或步长缩小到 min_step 仍失败时, 判定遇到转折点(解支折返), 输出带标记的点后结束.
+
+    Args:
+        f (Callable): 待解方程的函数 f(x, p)
+        x0 (float): 第一个参数值处的迭代起点
+        p_values (Iterable[float]): 依次求解的参数值, 应单调变化
+        dfdx (Callable | None): 可选参数, 偏导数 f_x(x, p), 默认使用对偶数自动微分
+        dfdp (Callable | None): 可选参数, 偏导数 f_p(x, p), 默认使用对偶数自动微分
+        predictor (str): 可选参数, 预测方式 "tangent" 或 "secant"
+        tol (float): 可选参数, 近似解的公差值
+        max_iter (int): 可选参数, 每次校正的最大迭代次数
+        min_step (float): 可选参数, 最小参数步长
+
+    Yields:
+        ContinuationPoint: 每个参数值处的解
+
+    """
+    if predictor not in ("tangent", "secant"):
+        err_msg: str = f"未知的预测方式: {predictor}"
+        raise ValueError(err_msg)
+    targets: Iterator[float] = iter(p_values)
+    p_cur: float | None = next(targets, None)
+    if p_cur is None:
+        return
+    x_cur, its, ok, fx_cur = _newton_correct(f, dfdx, x0, p_cur, tol, max_iter)
+    if not ok:
+        err_msg = f"p = {p_cur} 处从 x0 = {x0} 出发的牛顿迭代未收敛"
+        raise ValueError(err_msg)
+    yield ContinuationPoint(p_cur, x_cur, its)
+    p_prev: float | None = None
+    x_prev: float = x_cur
+    step: float = math.inf
+    for p_target in targets:
+        total: int = 0
+        while p_cur != p_target:
+            dp: float = math.copysign(min(abs(p_target - p_cur), step), p_target - p_cur)
+            if predictor == "secant":
+                slope: float = 0.0 if p_prev is None else (x_cur - x_prev) / (p_cur - p_prev)
+            else:
+                fp: float = _dual_eval(lambda q, x=x_cur: f(x, q), p_cur)[1] if dfdp is None else dfdp(x_cur, p_cur)
+                slope = -fp / fx_cur
+            x_new, its, ok, fx_new = _newton_correct(f, dfdx, x_cur + slope * dp, p_cur + dp, tol, max_iter)
+            total += its
+            if ok and fx_new * fx_cur > 0:
+                p_prev, x_prev = p_cur, x_cur
+                p_cur = p_target if abs(dp) == abs(p_target - p_cur) else p_cur + dp
+                x_cur, fx_cur = x_new, fx_new
+                if its <= 2:
+                    step = abs(dp) * 2
+                continue
+            step = abs(dp) / 2
+            if ok or step < min_step:
+                # 校正收敛到 f_x 异号的另一支解, 或步长已无法再缩小: 转折点位于 p_cur 与 p_cur + dp 之间
+                yield ContinuationPoint(p_cur, x_cur, total, turning_point=True)
+                return
+        yield ContinuationPoint(p_cur, x_cur, total)
+
+
+def test_continuation() -> None:
+    """continuation()的测试函数."""
+
+    def f(x: float, p: float) -> float:
+        return x**3 + x - p
+
+    ps: np.ndarray = np.linspace(0, 200, 2001)
+    points: list[ContinuationPoint] = list(continuation(f, 0.0, ps))
+    assert [pt.p for pt in points] == ps.tolist(), "应在每个给定参数处输出一个解"
+    assert all(abs(f(pt.x, pt.p)) <= 1e-10 for pt in points), "延拓求得的解误差过大"
+    warm: int = sum(pt.iterations for pt in points)
+    cold: int = sum(_newton_correct(f, None, 0.0, p, 1e-10, 100)[1] for p in ps)
+    assert warm * 5 < cold, "延拓应显著减少牛顿迭代次数"
+    secant: list[ContinuationPoint] = list(continuation(f, 0.0, ps, predictor="secant"))
+    assert np.allclose([pt.x for pt in secant], [pt.x for pt in points]), "割线预测与切线预测的结果不一致"
+
+    # x^2 = p 的正解支在 p = 0 处折返
+    fold: list[ContinuationPoint] = list(continuation(lambda x, p: x**2 - p, 1.0, np.linspace(1, -1, 21)))
+    assert fold[-1].turning_point, "应检测到转折点"
+    assert 0 <= fold[-1].p < 0.1, "转折点应位于 p = 0 附近"
+    assert not any(pt.turning_point for pt in fold[:-1]), "转折点之前的解不应带标记"
+
+
+@dataclass(frozen=True)
+class RootResult:
+    """求根结果.
+
+    Attributes:
+        root (float): 近似解
+        iterations (int): 迭代次数
+        evaluations (int): 实际调用 f 的次数, 命中缓存的点不计入
+        converged (bool): 是否满足收敛条件, 为 False 时 root 为预算耗尽前的最佳近似
+
+    """
+
+    root: float
+    iterations: int
+    evaluations: int
+    converged: bool
+
+
+class _BudgetExceededError(Exception):
+    """函数计算次数超出预算."""
+
+
+class _CachedFunction:
+    """缓存 f 的计算结果, 统计真实调用次数并限制调用预算."""
+
+    def __init__(self, f: Callable, max_eval: int, cache: dict[float, float] | None = None) -> None:
+        """包装待求根的函数."""
+        self._f: Callable = f
+        self._cache: dict[float, float] = {} if cache is None else cache
+        self.max_eval: int = max_eval
+        self.evaluations: int = 0
+
+    def __call__(self, x: float) -> float:
+        """返回 f(x), 已计算过的点直接取缓存."""
+        if x in self._cache:
+            return self._cache[x]
+        if self.evaluations >= self.max_eval:
+            raise _BudgetExceededError
+        self.evaluations += 1
+        fx: float = float(self._f(x))
+        self._cache[x] = fx
+        return fx
+
+
+def brent(
+    f: Callable,
+    x1: float,
+    x2: float,
+    *,
+    xtol: float = 2e-12,
+    rtol: float = 4 * np.finfo(float).eps,
+    ftol: float = 0.0,
+    max_eval: int = 100,
+    cache: dict[float, float] | None = None,
+) -> RootResult:
+    """使用 Brent 方法求方程近似解.
+
+    结合二分法的可靠性与割线法/逆二次插值的超线性收敛: 插值步落在当前区间内且收缩足够快时采用插值步,
+    否则退回二分步. 适合 f 计算代价高昂的情形, 通常只需二分法几分之一的函数调用次数.
+
+    Args:
+        f (Callable): 待解方程的函数
+        x1 (float): 求近似解的区间下界
+        x2 (float): 求近似解的区间上界
+        xtol (float): 可选参数, 近似解的绝对误差
+        rtol (float): 可选参数, 近似解的相对误差
+        ftol (float): 可选参数, |f(x)| 不超过该值时直接视为收敛
+        max_eval (int): 可选参数, f 的最大调用次数
+        cache (dict[float, float] | None): 可选参数, 已计算点的缓存, 传入同一个字典可在多次求解间复用
+
+    Returns:
+        RootResult: 近似解、迭代次数、函数调用次数及是否收敛
+
+    """
+    if max_eval < 2:  # noqa: PLR2004
+        err_msg: str = f"max_eval 至少为 2 (两个区间端点各需计算一次 f), 当前为 {max_eval}"
+        raise ValueError(err_msg)
+    func: _CachedFunction = _CachedFunction(f, max_eval, cache)
+    f_pre: float = func(x1)
+    f_cur: float = func(x2)
+    if f_pre * f_cur > 0:
+        err_msg = f"区间[{x1}, {x2}]内不一定有解!"
+        raise ValueError(err_msg)
+    x_pre: float = x1
+    x_cur: float = x2
+    if abs(f_pre) <= ftol or f_pre == 0:
+        return RootResult(x_pre, 0, func.evaluations, converged=True)
+    x_blk: float = x_pre
+    f_blk: float = f_pre
+    s_pre: float = 0.0
+    s_cur: float = 0.0
+    iterations: int = 0
+    try:
+        while True:
+            iterations += 1
+            if f_pre * f_cur < 0:
+                # x_blk 始终与 x_cur 构成有根区间
+                x_blk, f_blk = x_pre, f_pre
+                s_pre = s_cur = x_cur - x_pre
+            if abs(f_blk) < abs(f_cur):
+                x_pre, x_cur, x_blk = x_cur, x_blk, x_cur
+                f_pre, f_cur, f_blk = f_cur, f_blk, f_cur
+            delta: float = (xtol + rtol * abs(x_cur)) / 2
+            s_bis: float = (x_blk - x_cur) / 2
+            if abs(f_cur) <= ftol or f_cur == 0 or abs(s_bis) < delta:
+                return RootResult(x_cur, iterations, func.evaluations, converged=True)
+            if abs(s_pre) > delta and abs(f_cur) < abs(f_pre):
+                if x_pre == x_blk:
+                    # 割线法
+                    s_try: float = -f_cur * (x_cur - x_pre) / (f_cur - f_pre)
+                else:
+                    # 逆二次插值
+                    d_pre: float = (f_pre - f_cur) / (x_pre - x_cur)
+                    d_blk: float = (f_blk - f_cur) / (x_blk - x_cur)
+                    s_try = -f_cur * (f_blk * d_blk - f_pre * d_pre) / (d_blk * d_pre * (f_blk - f_pre))
+                if 2 * abs(s_try) < min(abs(s_pre), 3 * abs(s_bis) - delta):
+                    s_pre, s_cur = s_cur, s_try
+                else:
+                    s_pre = s_cur = s_bis
+            else:
+                s_pre = s_cur = s_bis
+            x_pre, f_pre = x_cur, f_cur
+            x_cur += s_cur if abs(s_cur) > delta else math.copysign(delta, s_bis)
+            f_cur = func(x_cur)
+    except _BudgetExceededError:
+        # 预算在计算新的 x_cur 时耗尽, x_cur 尚未求值; 在最后一个已求值的点与区间另一端中取 |f| 较小者
+        best: float = x_pre if abs(f_pre) <= abs(f_blk) else x_blk
+        return RootResult(best, iterations, func.evaluations, converged=False)
+
+
+def test_brent() -> None:
+    """brent()的测试函数."""
+    calls: list[float] = []
+
+    def f(x: float) -> float:
+        calls.append(x)
+        return x**2 - 4 * x + math.exp(-x)
+
+    result: RootResult = brent(f, -0.5, 1)
+    assert result.converged, "Brent 方法应在预算内收敛"
+    assert abs(f(result.root)) < 1e-12, "Brent 方法求得的近似解误差过大"
+    assert result.evaluations == len(calls) - 1 < 15, "Brent 方法的函数调用次数过多"
+
+    cache: dict[float, float] = {}
+    first: RootResult = brent(math.cos, 0, 3, cache=cache)
+    again: RootResult = brent(math.cos, 0, 3, cache=cache)
+    assert math.isclose(first.root, math.pi / 2), "cos(x) = 0 在 [0, 3] 内的解应为 pi / 2"
+    assert again.evaluations == 0, "复用缓存时不应再调用 f"
+
+    for max_eval in range(2, 12):
+        evaluated: dict[float, float] = {}
+
+        def cube(x: float, seen: dict[float, float] = evaluated) -> float:
+            seen[x] = abs(x**3 - 2)
+            return x**3 - 2
+
+        limited: RootResult = brent(cube, 0, 10, max_eval=max_eval)
+        assert not limited.converged, "预算耗尽时应返回未收敛的结果"
+        assert limited.evaluations == len(evaluated) == max_eval, "函数调用次数不应超过预算"
+        assert limited.root in evaluated, "预算耗尽时应返回已求值的点"
+        assert evaluated[limited.root] == min(evaluated.values()), "预算耗尽时应返回 |f| 最小的已求值点"
+    with pytest.raises(ValueError, match="max_eval 至少为 2"):
+        brent(math.cos, 0, 3, max_eval=1)
+    with pytest.raises(ValueError, match="内不一定有解"):
+        brent(math.exp, 0, 1)
+
+
 # Exercises
 # Exercise 4.1
-def is_prime(n: float) -> bool:
-    """Return True when n is a prime number."""
+# 用于预筛的小质数, 绝大多数合数会在这一步被直接排除
+_SMALL_PRIMES: tuple[int, ...] = tuple(i for i in range(2, 1000) if all(i % j for j in range(2, math.isqrt(i) + 1)))
+
+# 对 n < 3.3e24 确定性成立的 Miller-Rabin 底数, 覆盖全部 64 位整数
+_MR_BASES: tuple[int, ...] = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+_MR_DETERMINISTIC_LIMIT: int = 3_317_044_064_679_887_385_961_981
+
+
+def _miller_rabin(n: int, bases: tuple[int, ...]) -> bool:
+    """对奇数 n > 2 逐个底数进行强伪质数检验.
+
+    Args:
+        n (int): 待检验的奇数
+        bases (tuple[int, ...]): 检验使用的底数
+
+    Returns:
+        bool: n 对所有底数都是强伪质数时返回 True
+
+    """
+    d: int = n - 1
+    s: int = (d & -d).bit_length() - 1  # n - 1 = d * 2^s, d 为奇数
+    d >>= s
+    for a in bases:
+        x: int = pow(a, d, n)
+        if x in (1, n - 1):
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def _jacobi(a: int, n: int) -> int:
+    """计算雅可比符号 (a/n), n 为正奇数."""
+    a %= n
+    result: int = 1
+    while a:
+        while a % 2 == 0:
+            a //= 2
+            if n % 8 in (3, 5):
+                result = -result
+        a, n = n, a
+        if a % 4 == 3 and n % 4 == 3:
+            result = -result
+        a %= n
+    return result if n == 1 else 0
+
+
+def _strong_lucas_prp(n: int) -> bool:
+    """对奇数 n 进行强 Lucas 伪质数检验(Selfridge 参数选取法).
+
+    Args:
+        n (int): 待检验的奇数, 且不是完全平方数
+
+    Returns:
+        bool: n 是强 Lucas 伪质数时返回 True
+
+    """
+    # 依次尝试 D = 5, -7, 9, -11, ... 直到 (D/n) = -1
+    d_param: int = 5
+    while (j := _jacobi(d_param, n)) != -1:
+        if j == 0 and abs(d_param) != n:
+            return False
+        d_param = -d_param - 2 if d_param > 0 else -d_param + 2
+    q: int = (1 - d_param) // 4
+    d: int = n + 1
+    s: int = (d & -d).bit_length() - 1
+    d >>= s
+
+    def half(x: int) -> int:
+        # 模 n 意义下除以 2
+        return (x + n if x & 1 else x) // 2 % n
+
+    # 按 d 的二进制位从高到低计算 U_d, V_d 与 Q^d (P = 1)
+    u: int = 1
+    v: int = 1
+    qk: int = q % n
+    for bit in bin(d)[3:]:
+        u, v, qk = u * v % n, (v * v - 2 * qk) % n, qk * qk % n
+        if bit == "1":
+            u, v, qk = half(u + v), half(d_param * u + v), qk * q % n
+    if u == 0 or v == 0:
+        return True
+    for _ in range(s - 1):
+        v, qk = (v * v - 2 * qk) % n, qk * qk % n
+        if v == 0:
+            return True
+    return False
+
+
+def _is_prime_trial(n: int) -> bool:
+    """使用试除法判断 n 是否为质数."""
     if n <= 1:
         # 质数必须大于 1
         return False
@@ -66,23 +1138,640 @@ def is_prime(n: float) -> bool:
     return True
 
 
-def prime_filter(start: int, end: int) -> list[int]:
+def is_prime(n: float, method: str = "auto") -> bool:
+    """Return True when n is a prime number.
+
+    已通过 load_prime_bitset() 加载质数位图且 n 在其范围内时, 只需查询一个比特位.
+    否则使用精确的整数运算: 先用 1000 以内的小质数试除预筛, 再对 n < 3.3e24(覆盖全部 64 位整数)
+    使用确定性底数的 Miller-Rabin 检验, 更大的 n 使用 BPSW 检验(底数 2 的 Miller-Rabin + 强 Lucas 检验),
+    1000 位的大整数也只需数毫秒.
+
+    Args:
+        n (float): 待判断的数, 可以是 NumPy 整数, 浮点数必须恰好为整数
+        method (str): 可选参数, "auto" 为上述快速检验, "trial" 为原始的试除法
+
+    Returns:
+        bool: n 为质数时返回 True
+
+    """
+    if isinstance(n, np.integer):
+        # NumPy 整数没有 bit_length, 且运算可能溢出
+        n = int(n)
+    elif isinstance(n, float):
+        if not n.is_integer():
+            return False
+        n = int(n)
+    if method == "trial":
+        return _is_prime_trial(n)
+    if method != "auto":
+        err_msg: str = f"未知的质数判断方法: {method}"
+        raise ValueError(err_msg)
+    if n < 2:
+        return False
+    if _prime_bitset is not None and n <= _prime_bitset.limit:
+        return n in _prime_bitset
+    for p in _SMALL_PRIMES:
+        if n % p == 0:
+            return n == p
+    if n < _SMALL_PRIMES[-1] ** 2:
+        return True
+    if n < _MR_DETERMINISTIC_LIMIT:
+        return _miller_rabin(n, _MR_BASES)
+    return _miller_rabin(n, (2,)) and math.isqrt(n) ** 2 != n and _strong_lucas_prp(n)
+
+
+# 分段筛每段包含的奇数个数, 对应 256KB 的 bool 数组, 可以放进 CPU 的 L2 缓存
+_SEGMENT_SIZE: int = 1 << 18
+
+
+@lru_cache(maxsize=8)
+def _base_primes(limit: int) -> np.ndarray:
+    """使用埃氏筛求出 [2, limit] 内的所有质数, 作为分段筛的基础质数.
+
+    Args:
+        limit (int): 基础质数的上界, 通常为待筛区间上界的平方根
+
+    Returns:
+        np.ndarray: 只读的 int64 质数数组
+
+    """
+    if limit < 2:
+        primes: np.ndarray = np.empty(0, dtype=np.int64)
+    else:
+        sieve: np.ndarray = np.ones(limit + 1, dtype=bool)
+        sieve[:2] = False
+        sieve[4::2] = False
+        for i in range(3, math.isqrt(limit) + 1, 2):
+            if sieve[i]:
+                sieve[i * i :: 2 * i] = False
+        primes = np.flatnonzero(sieve).astype(np.int64)
+    primes.flags.writeable = False  # 缓存结果被多次复用, 禁止调用方修改
+    return primes
+
+
+def _sieve_segment(lo: int, hi: int, base_primes: np.ndarray) -> np.ndarray:
+    """筛出区间 [lo, hi) 内的所有奇质数.
+
+    段内只保存奇数, 下标 k 对应整数 lo + 2k.
+
+    Args:
+        lo (int): 区间下界, 必须为奇数
+        hi (int): 区间上界(不含)
+        base_primes (np.ndarray): 至少覆盖到 sqrt(hi) 的升序质数数组
+
+    Returns:
+        np.ndarray: 区间内的奇质数(int64)
+
+    """
+    seg: np.ndarray = np.ones((hi - lo + 1) // 2, dtype=bool)
+    odd_primes: np.ndarray = base_primes[1:] if len(base_primes) and base_primes[0] == 2 else base_primes
+    odd_primes = odd_primes[odd_primes * odd_primes < hi]
+    # 每个基础质数在段内的第一个奇倍数, 且不小于 p^2 以免把 p 自身筛掉
+    first: np.ndarray = np.maximum(odd_primes * odd_primes, (lo + odd_primes - 1) // odd_primes * odd_primes)
+    first += np.where(first % 2 == 0, odd_primes, 0)
+    for start, p in zip(((first - lo) // 2).tolist(), odd_primes.tolist(), strict=True):
+        seg[start::p] = False
+    if lo == 1:
+        seg[0] = False  # 1 不是质数
+    return lo + 2 * np.flatnonzero(seg)
+
+
+def _iter_prime_segments(
+    start: int,
+    end: int,
+    segment_size: int = _SEGMENT_SIZE,
+    base_primes: np.ndarray | None = None,
+) -> Iterator[np.ndarray]:
+    """按段依次产出 [start, end] 内的质数, 内存占用只与段长和 sqrt(end) 有关.
+
+    Args:
+        start (int): 区间下界
+        end (int): 区间上界(含)
+        segment_size (int): 每段包含的奇数个数
+        base_primes (np.ndarray | None): 覆盖 sqrt(end) 的基础质数, 默认现场计算
+
+    Yields:
+        np.ndarray: 每一段内的升序质数(int64)
+
+    """
+    if end < max(start, 2):
+        return
+    if start <= 2:
+        yield np.array([2], dtype=np.int64)
+    if base_primes is None:
+        base_primes = _base_primes(math.isqrt(end))
+    lo: int = max(start, 3) | 1  # 从不小于 start 的第一个奇数开始, 跳过所有偶数
+    while lo <= end:
+        hi: int = min(lo + 2 * segment_size, end + 1)
+        yield _sieve_segment(lo, hi, base_primes)
+        lo += 2 * segment_size
+
+
+# 工作进程中的基础质数视图, 由 _init_sieve_worker 映射到主进程创建的共享内存上
+_worker_shm: shared_memory.SharedMemory | None = None
+_worker_base_primes: np.ndarray | None = None
+
+
+def _init_sieve_worker(shm_name: str, count: int) -> None:
+    """进程池初始化函数: 挂载共享内存中的基础质数, 各进程不再复制."""
+    global _worker_shm, _worker_base_primes  # noqa: PLW0603
+    _worker_shm = shared_memory.SharedMemory(name=shm_name)
+    _worker_base_primes = np.ndarray((count,), dtype=np.int64, buffer=_worker_shm.buf)
+
+
+def _sieve_chunk(lo: int, hi: int, segment_size: int, count_only: bool) -> int | np.ndarray:  # noqa: FBT001
+    """工作进程任务: 使用共享的基础质数分段筛出 [lo, hi] 内的质数或其个数."""
+    segments: Iterator[np.ndarray] = _iter_prime_segments(lo, hi, segment_size, _worker_base_primes)
+    if count_only:
+        return sum(len(seg) for seg in segments)
+    chunks: list[np.ndarray] = list(segments)
+    return np.concatenate(chunks) if chunks else np.empty(0, dtype=np.int64)
+
+
+def parallel_sieve(
+    start: int,
+    end: int,
+    *,
+    max_workers: int | None = None,
+    chunk_size: int | None = None,
+    count_only: bool = False,
+    segment_size: int = _SEGMENT_SIZE,
+) -> np.ndarray:
+    """使用多进程并行筛出 [start, end] 内的质数.
+
+    区间被切分为长度为 chunk_size 的若干块分发到进程池, 每块在工作进程内再按缓存大小分段筛.
+    基础质数只在主进程计算一次, 通过 multiprocessing.shared_memory 供所有工作进程共享.
+
+    Args:
+        start (int): 求质数范围的下界
+        end (int): 求质数范围的上界
+        max_workers (int | None): 可选参数, 进程池大小, 默认为 CPU 核心数
+        chunk_size (int | None): 可选参数, 每块的整数个数, 默认使每个进程约分到 8 块
+        count_only (bool): 可选参数, 为 True 时只返回每块内的质数个数
+        segment_size (int): 可选参数, 分段筛每段包含的奇数个数
+
+    Returns:
+        np.ndarray: count_only 为 True 时返回各块的质数个数, 第 i 块为
+            [start + i * chunk_size, start + (i + 1) * chunk_size - 1] 与 [start, end] 的交集;
+            否则返回拼接后的全部质数(int64)
+
+    """
+    workers: int = max_workers or os.cpu_count() or 1
+    length: int = max(end - start + 1, 0)
+    if chunk_size is None:
+        chunk_size = max(-(-length // (workers * 8)), 2 * segment_size)
+    bounds: list[int] = list(range(start, end + 1, chunk_size))
+    base_primes: np.ndarray = _base_primes(math.isqrt(max(end, 0)))
+    shm: shared_memory.SharedMemory = shared_memory.SharedMemory(create=True, size=max(base_primes.nbytes, 1))
+    try:
+        np.ndarray(base_primes.shape, dtype=np.int64, buffer=shm.buf)[:] = base_primes
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_sieve_worker,
+            initargs=(shm.name, len(base_primes)),
+        ) as executor:
+            results: list[int | np.ndarray] = list(
+                executor.map(
+                    _sieve_chunk,
+                    bounds,
+                    [min(lo + chunk_size - 1, end) for lo in bounds],
+                    itertools.repeat(segment_size),
+                    itertools.repeat(count_only),
+                ),
+            )
+    finally:
+        shm.close()
+        shm.unlink()
+    if count_only:
+        return np.array(results, dtype=np.int64)
+    return np.concatenate(results) if results else np.empty(0, dtype=np.int64)
+
+
+def prime_filter(
+    start: int,
+    end: int,
+    *,
+    as_array: bool = False,
+    segment_size: int = _SEGMENT_SIZE,
+    max_workers: int | None = 1,
+) -> list[int] | np.ndarray:
     """求出给定范围内的所有质数.
 
+    使用只处理奇数的分段埃氏筛, 每段大小适配 CPU 缓存, 只需要 sqrt(end) 以内的基础质数,
+    因此可以直接筛任意区间 [start, end] 而不必从 1 开始.
+    已加载的质数位图覆盖 end 时, 直接扫描位图而不再筛.
+
     Args:
         start (int): 求质数范围的下界
         end (int): 求质数范围的上界
+        as_array (bool): 可选参数, 为 True 时返回 int64 的 NumPy 数组, 默认返回列表
+        segment_size (int): 可选参数, 分段筛每段包含的奇数个数
+        max_workers (int | None): 可选参数, 默认为 1 即单进程; 其他值交给 parallel_sieve 多进程并行筛,
+            None 表示使用全部 CPU 核心
 
     Returns:
-        list[int]: 给定数据范围内的所有质数
+        list[int] | np.ndarray: 给定数据范围内的所有质数
 
     """
-    return list(filter(is_prime, list(range(start, end + 1))))
+    if _prime_bitset is not None and end <= _prime_bitset.limit:
+        result: np.ndarray = _prime_bitset.primes_in(start, end)
+    elif max_workers == 1:
+        chunks: list[np.ndarray] = list(_iter_prime_segments(start, end, segment_size))
+        result = np.concatenate(chunks) if chunks else np.empty(0, dtype=np.int64)
+    else:
+        result = parallel_sieve(start, end, max_workers=max_workers, segment_size=segment_size)
+    return result if as_array else result.tolist()
+
+
+_BITSET_MAGIC: bytes = b"PYMPRIME"
+_BITSET_HEADER_SIZE: int = 16  # 8 字节魔数 + 8 字节小端序 uint64 上界
+
+
+class PrimeBitset:
+    """磁盘上的只含奇数的质数位图, 通过 mmap 只读打开.
+
+    文件由 build() 一次性生成, 第 i 位(小端位序)表示奇数 2i + 1 是否为质数.
+    所有打开同一文件的进程共享操作系统的页缓存, 不会各自复制一份.
+
+    Attributes:
+        limit (int): 位图覆盖的上界 N
+
+    """
+
+    def __init__(self, path: str | os.PathLike[str]) -> None:
+        """以只读方式映射位图文件."""
+        with open(path, "rb") as fh:
+            self._mmap: mmap.mmap = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:8] != _BITSET_MAGIC:
+            self._mmap.close()
+            err_msg: str = f"{os.fspath(path)} 不是质数位图文件"
+            raise ValueError(err_msg)
+        self.limit: int = int.from_bytes(self._mmap[8:_BITSET_HEADER_SIZE], "little")
+        self._bits: np.ndarray = np.frombuffer(self._mmap, dtype=np.uint8, offset=_BITSET_HEADER_SIZE)
+
+    @classmethod
+    def build(
+        cls,
+        path: str | os.PathLike[str],
+        limit: int,
+        segment_size: int = _SEGMENT_SIZE,
+    ) -> "PrimeBitset":
+        """分段筛出 [1, limit] 内的质数并写入位图文件, 返回打开后的位图.
+
+        先写临时文件再替换, 其他进程不会读到写了一半的文件.
+        segment_size 会向下取整为 8 的倍数, 使每段恰好占整数个字节, 因此不能小于 8.
+        """
+        if segment_size < 8:  # noqa: PLR2004
+            err_msg: str = f"segment_size 至少为 8, 当前为 {segment_size}"
+            raise ValueError(err_msg)
+        segment_size -= segment_size % 8  # 每段恰好占整数个字节
+        base_primes: np.ndarray = _base_primes(math.isqrt(limit))
+        tmp_path: str = f"{os.fspath(path)}.tmp"
+        with open(tmp_path, "wb") as fh:
+            fh.write(_BITSET_MAGIC + limit.to_bytes(8, "little"))
+            lo: int = 1
+            while lo <= limit:
+                hi: int = min(lo + 2 * segment_size, limit + 1)
+                bits: np.ndarray = np.zeros((hi - lo + 1) // 2, dtype=bool)
+                bits[(_sieve_segment(lo, hi, base_primes) - lo) // 2] = True
+                fh.write(np.packbits(bits, bitorder="little").tobytes())
+                lo += 2 * segment_size
+        os.replace(tmp_path, path)
+        return cls(path)
+
+    def _check(self, n: int) -> None:
+        """检查 n 不超过位图的上界."""
+        if n > self.limit:
+            err_msg: str = f"{n} 超出质数位图的上界 {self.limit}"
+            raise ValueError(err_msg)
+
+    def __contains__(self, n: int) -> bool:
+        """查询一个比特位判断 n 是否为质数."""
+        self._check(n)
+        if n < 3 or n % 2 == 0:
+            return n == 2
+        i: int = n >> 1
+        return bool(self._mmap[_BITSET_HEADER_SIZE + (i >> 3)] >> (i & 7) & 1)
+
+    def primes_in(self, start: int, end: int, chunk_bytes: int = 1 << 20) -> np.ndarray:
+        """扫描位图, 返回 [start, end] 内的所有质数(int64).
+
+        每次只展开 chunk_bytes 个字节的位, 扫描大区间时内存占用有界.
+        """
+        self._check(end)
+        chunks: list[np.ndarray] = [np.array([2], dtype=np.int64)] if start <= 2 <= end else []
+        first: int = max(start, 3) // 2  # 第一个待扫描的位
+        last: int = (end - 1) // 2  # 最后一个待扫描的位
+        while first <= last:
+            byte_lo: int = first >> 3
+            byte_hi: int = min(byte_lo + chunk_bytes, (last >> 3) + 1)
+            bits: np.ndarray = np.unpackbits(self._bits[byte_lo:byte_hi], bitorder="little")
+            stop: int = min(last, 8 * byte_hi - 1)
+            idx: np.ndarray = np.flatnonzero(bits[first - 8 * byte_lo : stop - 8 * byte_lo + 1]) + first
+            chunks.append(2 * idx.astype(np.int64) + 1)
+            first = stop + 1
+        return np.concatenate(chunks) if chunks else np.empty(0, dtype=np.int64)
+
+    def close(self) -> None:
+        """解除内存映射."""
+        del self._bits
+        self._mmap.close()
+
+
+# 当前进程使用的质数位图, 由 load_prime_bitset() 设置
+_prime_bitset: PrimeBitset | None = None
+
+
+def load_prime_bitset(path: str | os.PathLike[str] | None) -> PrimeBitset | None:
+    """加载质数位图, 之后 is_prime() 与 prime_filter() 在其范围内直接查询位图.
+
+    也可以设置环境变量 PYMATH_PRIME_BITSET 为位图路径, 导入本模块时自动加载.
+
+    Args:
+        path (str | os.PathLike[str] | None): PrimeBitset.build() 生成的位图文件, 为 None 时卸载当前位图
+
+    Returns:
+        PrimeBitset | None: 加载后的位图
+
+    """
+    global _prime_bitset  # noqa: PLW0603
+    if _prime_bitset is not None:
+        _prime_bitset.close()
+    _prime_bitset = PrimeBitset(path) if path is not None else None
+    return _prime_bitset
+
+
+if os.path.exists(os.environ.get("PYMATH_PRIME_BITSET", "")):
+    load_prime_bitset(os.environ["PYMATH_PRIME_BITSET"])
+
+
+def test_prime_bitset(tmp_path: os.PathLike[str]) -> None:
+    """PrimeBitset的测试函数."""
+    path: str = os.path.join(tmp_path, "primes.bits")
+    bitset: PrimeBitset = PrimeBitset.build(path, 100_003, segment_size=1000)
+    assert bitset.primes_in(1, 100_003).tolist() == prime_filter(1, 100_003), "位图扫描的质数错误"
+    assert bitset.primes_in(90, 100, chunk_bytes=1).tolist() == [97], "位图扫描区间 [90, 100] 的质数错误"
+    assert [n for n in range(1000) if n in bitset] == prime_filter(1, 999), "位图查询的质数错误"
+    bitset.close()
+    try:
+        load_prime_bitset(path)
+        assert is_prime(99_991), "通过位图判断 99991 为质数"
+        assert not is_prime(99_993), "通过位图判断 99993 为合数"
+        expected: list[int] = [99_901, 99_907, 99_923, 99_929, 99_961, 99_971, 99_989, 99_991, 100_003]
+        assert prime_filter(99_900, 100_003) == expected, "通过位图筛选的质数错误"
+    finally:
+        load_prime_bitset(None)
+    with pytest.raises(ValueError, match="超出质数位图的上界"):
+        PrimeBitset(path).primes_in(1, 100_004)
+    with pytest.raises(ValueError, match="segment_size 至少为 8"):
+        PrimeBitset.build(path, 100, segment_size=7)
+    small: PrimeBitset = PrimeBitset.build(path, 100, segment_size=8)
+    assert small.primes_in(1, 100).tolist() == prime_filter(1, 100), "最小分段的位图质数错误"
+    small.close()
+
+
+def test_is_prime() -> None:
+    """is_prime()的测试函数."""
+    assert [i for i in range(10_000) if is_prime(i)] == [i for i in range(10_000) if is_prime(i, method="trial")], (
+        "10_000 以内的质数判断与试除法不一致"
+    )
+    assert is_prime(7.0), "整数值的浮点数 7.0 应判断为质数"
+    assert not is_prime(7.5), "非整数不是质数"
+    assert is_prime(np.int64(1_000_003)), "NumPy 整数 1000003 应判断为质数"
+    assert not is_prime(np.uint32(1_000_001)), "NumPy 整数 1000001 应判断为合数"
+    assert not is_prime(3_215_031_751), "强伪质数 3215031751 (底数 2, 3, 5, 7) 应判断为合数"
+    assert not is_prime(3_825_123_056_546_413_051), "强伪质数 3825123056546413051 应判断为合数"
+    assert is_prime((1 << 61) - 1), "梅森数 2^61 - 1 是质数"
+    assert not is_prime((1 << 67) - 1), "梅森数 2^67 - 1 是合数"
+    assert is_prime((1 << 127) - 1), "梅森数 2^127 - 1 是质数"
+    assert is_prime((1 << 521) - 1), "梅森数 2^521 - 1 是质数"
+    assert not is_prime(((1 << 89) - 1) * ((1 << 107) - 1)), "两个梅森质数的乘积是合数"
+    assert not is_prime(((1 << 127) - 1) ** 2), "完全平方数是合数"
 
 
 def test_prime_filter() -> None:
     """prime_filter()的测试函数."""
     assert prime_filter(1, 10) == [2, 3, 5, 7], "质数计算错误"
+    assert prime_filter(0, 1) == [], "1 以内不应存在质数"
+    assert prime_filter(2, 2) == [2], "区间 [2, 2] 的质数计算错误"
+    assert prime_filter(1, 1000, segment_size=16) == [i for i in range(1, 1001) if is_prime(i)], (
+        "跨段筛选的质数计算错误"
+    )
+    window: list[int] = prime_filter(10**9, 10**9 + 1000)
+    assert window == [i for i in range(10**9, 10**9 + 1001) if is_prime(i)], "任意区间的质数计算错误"
+    primes: np.ndarray = prime_filter(1, 100, as_array=True)
+    assert primes.dtype == np.int64, "返回数组的类型错误"
+    assert len(primes) == 25, "100 以内的质数个数应为 25"
+
+
+def test_parallel_sieve() -> None:
+    """parallel_sieve()的测试函数."""
+    expected: list[int] = prime_filter(10**7, 10**7 + 100_000)
+    assert prime_filter(10**7, 10**7 + 100_000, max_workers=2) == expected, "并行筛选的质数计算错误"
+    counts: np.ndarray = parallel_sieve(1, 100_000, max_workers=2, chunk_size=10_000, count_only=True)
+    assert len(counts) == 10, "应按 chunk_size 切分为 10 块"
+    assert counts[0] == 1229, "10_000 以内的质数个数应为 1229"
+    assert counts.sum() == 9592, "100_000 以内的质数个数应为 9592"
+
+
+def prime_count(x: int) -> int:
+    """不枚举质数, 计算不超过 x 的质数个数 π(x).
+
+    使用 Lucy_Hedgehog 算法: S(v) 初始为 [2, v] 内的整数个数, 依次对每个质数 p <= sqrt(x)
+    去掉以 p 为最小质因子的合数, S(v) -= S(v // p) - S(p - 1).
+    只需要维护 v 取 x // i 这 O(sqrt(x)) 个值, 每个质数的更新都是一次 NumPy 数组运算,
+    时间复杂度 O(x^(3/4)), 内存 O(sqrt(x)).
+
+    Args:
+        x (int): 给定的上界
+
+    Returns:
+        int: 不超过 x 的质数个数
+
+    """
+    if x < 2:
+        return 0
+    r: int = math.isqrt(x)
+    # small[v] 对应 S(v), v <= r; large[i] 对应 S(x // i), 1 <= i <= r
+    small: np.ndarray = np.arange(-1, r, dtype=np.int64)
+    small[0] = 0
+    idx: np.ndarray = np.arange(1, r + 1, dtype=np.int64)
+    large: np.ndarray = np.zeros(r + 1, dtype=np.int64)
+    large[1:] = x // idx - 1
+    for p in _base_primes(r).tolist():
+        primes_below: int = int(small[p - 1])
+        # 只有 v >= p^2 的 S(v) 需要更新; 右侧整体先求值, 等价于按 v 递减顺序原地更新
+        count: int = min(r, x // (p * p))
+        d: np.ndarray = idx[:count] * p
+        inner: np.ndarray = d <= r
+        removed: np.ndarray = np.empty(count, dtype=np.int64)
+        removed[inner] = large[d[inner]]
+        removed[~inner] = small[x // d[~inner]]
+        large[1 : count + 1] -= removed - primes_below
+        if p * p <= r:
+            small[p * p :] -= small[idx[p * p - 1 :] // p] - primes_below
+    return int(large[1])
+
+
+def prime_count_range(start: int, end: int, segment_size: int = _SEGMENT_SIZE) -> int:
+    """分段筛统计 [start, end] 内的质数个数, 只计数而不保存质数.
+
+    适合较窄的区间; 区间很宽时 prime_count(end) - prime_count(start - 1) 更快.
+
+    Args:
+        start (int): 区间下界
+        end (int): 区间上界(含)
+        segment_size (int): 可选参数, 分段筛每段包含的奇数个数
+
+    Returns:
+        int: 区间内的质数个数
+
+    """
+    return sum(len(seg) for seg in _iter_prime_segments(start, end, segment_size))
+
+
+def test_prime_count() -> None:
+    """prime_count()的测试函数."""
+    expected: list[int] = [0, 4, 25, 168, 1229, 9592, 78498, 664_579, 5_761_455, 50_847_534]
+    assert [prime_count(10**k) for k in range(10)] == expected, "10 的幂以内的质数个数计算错误"
+    assert [prime_count(x) for x in range(200)] == [len(prime_filter(1, x)) for x in range(200)], (
+        "200 以内的质数个数计算错误"
+    )
+    assert prime_count(10**10) - prime_count(10**10 - 10**6 - 1) == prime_count_range(10**10 - 10**6, 10**10), (
+        "区间内的质数个数计算错误"
+    )
+
+
+@dataclass(frozen=True)
+class PrimeCheckpoint:
+    """质数流的断点, 用于在中断后恢复搜索.
+
+    Attributes:
+        position (int): 下一个尚未产出的整数
+        base_limit (int): base_primes 覆盖的上界, 该上界以内的质数全部已知
+        base_primes (np.ndarray): 已求出的基础质数
+
+    """
+
+    position: int
+    base_limit: int
+    base_primes: np.ndarray
+
+    def save(self, path: str | os.PathLike[str]) -> None:
+        """将断点保存为 .npz 文件, 先写临时文件再替换, 写入中途崩溃也不会损坏旧断点."""
+        tmp_path: str = f"{os.fspath(path)}.tmp"
+        with open(tmp_path, "wb") as fh:
+            np.savez(fh, position=self.position, base_limit=self.base_limit, base_primes=self.base_primes)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str | os.PathLike[str]) -> "PrimeCheckpoint":
+        """从 save() 保存的文件中读取断点."""
+        with np.load(path) as data:
+            return cls(int(data["position"]), int(data["base_limit"]), data["base_primes"])
+
+
+class PrimeStream:
+    """基于增量分段筛的无界质数迭代器.
+
+    每次只筛一段, 基础质数按需扩展到当前位置的平方根, 内存占用为 O(sqrt(n)).
+    可随时调用 checkpoint() 保存进度, 之后通过 primes(checkpoint=...) 从断点继续.
+    """
+
+    def __init__(
+        self,
+        start: int = 2,
+        checkpoint: PrimeCheckpoint | None = None,
+        segment_size: int = _SEGMENT_SIZE,
+    ) -> None:
+        """初始化质数流, 提供 checkpoint 时忽略 start."""
+        self._segment_size: int = segment_size
+        if checkpoint is None:
+            self._position: int = max(start, 2)
+            self._base_limit: int = 1
+            self._base: np.ndarray = np.empty(0, dtype=np.int64)
+        else:
+            self._position = checkpoint.position
+            self._base_limit = checkpoint.base_limit
+            self._base = checkpoint.base_primes
+        self._buffer: list[int] = []
+        self._index: int = 0
+
+    def _extend_base(self, limit: int) -> None:
+        """把基础质数扩展到至少覆盖 limit."""
+        if self._base_limit < 2:
+            self._base_limit = max(limit, 2)
+            self._base = _base_primes(self._base_limit)
+        while self._base_limit < limit:
+            # 新区间的上界不超过已知上界的平方, 保证已有基础质数足以筛出新的基础质数
+            new_limit: int = min(max(limit, 2 * self._base_limit), self._base_limit**2)
+            extra: np.ndarray = _sieve_segment((self._base_limit + 1) | 1, new_limit + 1, self._base)
+            self._base = np.concatenate((self._base, extra))
+            self._base_limit = new_limit
+
+    def _fill(self) -> None:
+        """从当前位置开始筛下一段质数放入缓冲区."""
+        if self._position <= 2:
+            self._buffer = [2]
+        else:
+            lo: int = self._position | 1
+            hi: int = lo + 2 * self._segment_size
+            self._extend_base(math.isqrt(hi - 1))
+            self._buffer = _sieve_segment(lo, hi, self._base).tolist()
+            if not self._buffer:
+                self._position = hi
+        self._index = 0
+
+    def __iter__(self) -> "PrimeStream":
+        """返回迭代器自身."""
+        return self
+
+    def __next__(self) -> int:
+        """返回下一个质数."""
+        while self._index >= len(self._buffer):
+            self._fill()
+        p: int = self._buffer[self._index]
+        self._index += 1
+        self._position = p + 1
+        return p
+
+    def checkpoint(self) -> PrimeCheckpoint:
+        """返回当前进度的断点, 恢复后从上一个已产出质数之后继续."""
+        return PrimeCheckpoint(self._position, self._base_limit, self._base)
+
+
+def primes(
+    start: int = 2,
+    *,
+    checkpoint: PrimeCheckpoint | None = None,
+    segment_size: int = _SEGMENT_SIZE,
+) -> PrimeStream:
+    """惰性地依次产出不小于 start 的所有质数.
+
+    Args:
+        start (int): 可选参数, 起始位置, 默认为 2
+        checkpoint (PrimeCheckpoint | None): 可选参数, 从 PrimeStream.checkpoint() 保存的断点继续
+        segment_size (int): 可选参数, 分段筛每段包含的奇数个数
+
+    Returns:
+        PrimeStream: 无界的质数迭代器
+
+    """
+    return PrimeStream(start, checkpoint, segment_size)
+
+
+def test_primes(tmp_path: os.PathLike[str]) -> None:
+    """primes()的测试函数."""
+    stream: PrimeStream = primes(segment_size=64)
+    first: list[int] = [next(stream) for _ in range(2000)]
+    assert first == prime_filter(1, first[-1]), "质数流产出的质数错误"
+    assert list(itertools.islice(primes(start=10**9), 3)) == prime_filter(10**9, 10**9 + 100)[:3], "指定起点的质数错误"
+    assert next(primes(start=-5)) == 2, "起点小于 2 时应从 2 开始"
+
+    path: str = os.path.join(tmp_path, "primes.npz")
+    stream.checkpoint().save(path)
+    resumed: PrimeStream = primes(checkpoint=PrimeCheckpoint.load(path), segment_size=64)
+    assert [next(resumed) for _ in range(500)] == [next(stream) for _ in range(500)], "从断点恢复后的质数错误"
 
 
 def cal_prime() -> int:
@@ -92,33 +1781,103 @@ def cal_prime() -> int:
         int: 对于任意质数 p, 第一个非质数的 2**p - 1
 
     """
-    i: int = 1
-    while True:
-        i: int = i + 1
-        if not is_prime(i):
-            continue
-        n: int | float = math.pow(2, i) - 1
-        if not is_prime(n):
+    for i in primes():
+        n: int = (1 << i) - 1  # 使用整数运算, 避免 math.pow 在 2^53 以上丢失精度
+        if not lucas_lehmer(i):
             print(f"质数 {i} 的 2^p - 1 = {n} 不是质数, 成功证伪")
             return i
 
 
-def mason_prime(limit: int = 40) -> list[int]:
+# 梅森数 2^p - 1 的因子必为 2kp + 1 的形式, 先在该上界内试除以快速排除合数
+_MERSENNE_TRIAL_BOUND: int = 1 << 20
+# 质数上界不小于该值时, mason_prime 默认使用进程池并行检验
+_MERSENNE_PARALLEL_LIMIT: int = 1000
+
+
+def _mersenne_has_small_factor(p: int) -> bool:
+    """检查梅森数 2^p - 1 (p 为奇质数) 是否存在形如 2kp + 1 的小因子."""
+    m: int = (1 << p) - 1
+    q: int = 2 * p + 1
+    while q < _MERSENNE_TRIAL_BOUND and q * q <= m:
+        # 梅森数的因子还必须满足 q ≡ ±1 (mod 8)
+        if q % 8 in (1, 7) and pow(2, p, q) == 1:
+            return True
+        q += 2 * p
+    return False
+
+
+def lucas_lehmer(p: int) -> bool:
+    """使用 Lucas-Lehmer 检验判断 2^p - 1 是否为梅森质数.
+
+    检验序列 s_0 = 4, s_{k+1} = s_k^2 - 2, 2^p - 1 为质数当且仅当 s_{p-2} ≡ 0 (mod 2^p - 1).
+    由于 2^p ≡ 1 (mod 2^p - 1), 取模运算可以用移位和加法代替除法.
+
+    Args:
+        p (int): 梅森数的指数
+
+    Returns:
+        bool: 2^p - 1 为质数时返回 True
+
+    """
+    if p == 2:
+        return True
+    if not is_prime(p) or _mersenne_has_small_factor(p):
+        # 指数 p 为合数时 2^p - 1 必为合数
+        return False
+    m: int = (1 << p) - 1
+    s: int = 4
+    for _ in range(p - 2):
+        s = s * s
+        s = (s & m) + (s >> p)
+        s = (s & m) + (s >> p)
+        s -= 2
+        if s < 0:
+            s += m
+    return s in (0, m)
+
+
+def mason_prime(
+    limit: int = 40,
+    *,
+    max_workers: int | None = None,
+    progress: Callable[[int, int], None] | None = None,
+) -> list[int]:
     """找出 40 以内的所有梅森质数.
 
-    梅森质数是形如 $2^p -1$ 的质数, 其中 p 也是质数
+    梅森质数是形如 $2^p -1$ 的质数, 其中 p 也是质数.
+    每个候选指数使用 Lucas-Lehmer 检验, 数据范围较大时分发到进程池并行计算.
 
     Args:
         limit (int): 给定的数据范围
+        max_workers (int | None): 可选参数, 进程池大小, 为 1 时串行计算;
+            默认在 limit 不小于 1000 时使用全部 CPU 核心
+        progress (Callable[[int, int], None] | None): 可选参数, 进度回调, 每完成一个指数调用一次
+            progress(已完成个数, 总个数)
 
     Returns:
         list[int]: 给定数据范围内的所有梅森质数
 
     """
-    primes: list[int] = list(filter(is_prime, range(1, limit + 1)))
-    print(f"1 ~ 40 的质数包括 {primes}")
-    # mason_primes: list[int] = list(filter(lambda x: is_prime(math.pow(2, x) - 1), primes))
-    mason_primes: list[int] = [i for i in primes if is_prime((1 << i) - 1)]  # 使用 1 << p - 1 计算 $2^p -1$
+    candidates: list[int] = prime_filter(1, limit)
+    print(f"1 ~ {limit} 的质数包括 {candidates}")
+    if max_workers is None:
+        max_workers = 1 if limit < _MERSENNE_PARALLEL_LIMIT else os.cpu_count()
+    total: int = len(candidates)
+    results: dict[int, bool] = {}
+    if max_workers == 1:
+        for i in candidates:
+            results[i] = lucas_lehmer(i)
+            if progress is not None:
+                progress(len(results), total)
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            # 检验耗时随指数快速增长, 先提交大指数以均衡各进程的负载
+            futures = {executor.submit(lucas_lehmer, i): i for i in reversed(candidates)}
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+                if progress is not None:
+                    progress(len(results), total)
+    mason_primes: list[int] = [i for i in candidates if results[i]]
     print(f"其中的梅森质数有 {mason_primes}")
     print(f"其梅森质数计算结果为 {[((1 << i) - 1) for i in mason_primes]}")
     return mason_primes
@@ -128,36 +1887,239 @@ def test_mason_prime() -> None:
     """mason_prime()的测试函数."""
     assert mason_prime() == [2, 3, 5, 7, 13, 17, 19, 31], "40 以内的梅森质数计算错误"
 
+    calls: list[tuple[int, int]] = []
+    result: list[int] = mason_prime(limit=610, max_workers=2, progress=lambda done, total: calls.append((done, total)))
+    assert result == [2, 3, 5, 7, 13, 17, 19, 31, 61, 89, 107, 127, 521, 607], "610 以内的梅森质数计算错误"
+    assert calls[-1] == (111, 111), "进度回调应覆盖全部 111 个候选指数"
+    assert not lucas_lehmer(11), "2^11 - 1 = 2047 = 23 * 89 是合数"
+    assert not lucas_lehmer(9), "指数为合数时 2^p - 1 是合数"
+
 
 # Exercise 4.4
+def _pollard_brent(n: int) -> int:
+    """使用 Pollard-Brent rho 算法求奇合数 n 的一个非平凡因子.
+
+    Args:
+        n (int): 奇合数
+
+    Returns:
+        int: n 的一个非平凡因子
+
+    """
+    batch: int = 128  # 累乘 batch 个差值后再统一求一次最大公约数
+    c: int = 0
+    while True:
+        c += 1  # 当前多项式 x^2 + c 失败时换下一个 c 重试
+        y: int = 2
+        r: int = 1
+        q: int = 1
+        g: int = 1
+        x: int = y
+        ys: int = y
+        while g == 1:
+            x = y
+            for _ in range(r):
+                y = (y * y + c) % n
+            k: int = 0
+            while k < r and g == 1:
+                ys = y
+                for _ in range(min(batch, r - k)):
+                    y = (y * y + c) % n
+                    q = q * abs(x - y) % n
+                g = math.gcd(q, n)
+                k += batch
+            r *= 2
+        if g == n:
+            # 批量累乘跨过了因子, 从该批次的起点逐步回退查找
+            g = 1
+            while g == 1:
+                ys = (ys * ys + c) % n
+                g = math.gcd(abs(x - ys), n)
+        if g != n:
+            return g
+
+
 def factors(n: int) -> list[int]:
     """对整数 n 进行质因子分解.
 
+    分层进行: 先用 1000 以内的小质数试除, 剩余部分若已是质数(Miller-Rabin 检验)则直接结束,
+    否则使用 Pollard-Brent rho 算法拆分合数.
+
     Args:
         n (int): 给定的正整数
 
     Returns:
-        list[int]: 给定正整数的质因子列表
+        list[int]: 给定正整数的质因子列表(升序)
 
     """
+    if isinstance(n, np.integer):
+        # NumPy 整数在 Pollard-Brent 的乘法中会溢出
+        n = int(n)
+    if n < 1:
+        err_msg: str = "n 必须为正整数"
+        raise ValueError(err_msg)
     factor_lst: list[int] = []
-    prime_lst: list[int] = prime_filter(start=1, end=int(math.sqrt(n) + 1))
-    for i in prime_lst:
+    for i in _SMALL_PRIMES:
+        if i * i > n:
+            break
         while n % i == 0:
             factor_lst.append(i)
             n: int = n // i
-    if n > 2:
-        factor_lst.append(n)
-    return factor_lst
+    composites: list[int] = [n] if n > 1 else []
+    while composites:
+        m: int = composites.pop()
+        if is_prime(m):
+            factor_lst.append(m)
+        else:
+            d: int = _pollard_brent(m)
+            composites.extend((d, m // d))
+    return sorted(factor_lst)
 
 
 def test_factors() -> None:
     """factors()的测试函数."""
     assert factors(60) == [2, 2, 3, 5], "正整数 60 的质因子计算错误"
     assert factors(36) == [2, 2, 3, 3], "正整数 36 的质因子计算错误"
+    assert factors(1) == [], "正整数 1 没有质因子"
+    assert factors(np.int64(1_000_006)) == [2, 7, 71_429], "NumPy 整数的质因子计算错误"
+    assert all(type(p) is int for p in factors(np.int64(1_000_006))), "NumPy 整数的质因子应为 int"
+    assert factors(997 * 997) == [997, 997], "小质数平方的质因子计算错误"
+    assert factors(4_294_967_279 * 4_294_967_291) == [4_294_967_279, 4_294_967_291], "64 位半质数的质因子计算错误"
+    assert factors((1 << 64) + 1) == [274_177, 67_280_421_310_721], "2^64 + 1 的质因子计算错误"
+    assert factors(1_000_003**3 * ((1 << 61) - 1)) == [1_000_003] * 3 + [(1 << 61) - 1], "128 位整数的质因子计算错误"
+    with pytest.raises(ValueError, match="n 必须为正整数"):
+        factors(0)
+
+
+class SmallestPrimeFactorTable:
+    """[1, N] 内所有整数的最小质因子表, 用于批量质因子分解.
+
+    表只构建一次, 以 uint32 数组保存(约 4N 字节), 之后任意 n <= N 的分解只需 O(log n) 次查表.
+
+    Attributes:
+        limit (int): 表覆盖的上界 N
+        spf (np.ndarray): spf[n] 为 n 的最小质因子, spf[0] = spf[1] = 0
+
+    """
+
+    def __init__(self, limit: int) -> None:
+        """构建 [1, limit] 的最小质因子表."""
+        if not 1 <= limit < 1 << 32:
+            err_msg: str = "limit 必须在 [1, 2^32) 范围内"
+            raise ValueError(err_msg)
+        self.limit: int = limit
+        spf: np.ndarray = np.zeros(limit + 1, dtype=np.uint32)
+        spf[2::2] = 2
+        for p in _base_primes(math.isqrt(limit))[1:].tolist():
+            # 只为尚未标记的倍数写入 p, 从 p^2 开始, 更小的倍数已被更小的质数标记
+            multiples: np.ndarray = spf[p * p :: p]
+            multiples[multiples == 0] = p
+        rest: np.ndarray = np.flatnonzero(spf == 0)
+        spf[rest] = rest  # 未被标记的数(除 0, 1 外)都是质数, 最小质因子为其本身
+        spf[:2] = 0
+        self.spf: np.ndarray = spf
+
+    def _check(self, values: np.ndarray) -> None:
+        """检查查询值都在 [1, limit] 范围内."""
+        if values.size and (values.min() < 1 or values.max() > self.limit):
+            err_msg: str = f"查询值必须在 [1, {self.limit}] 范围内"
+            raise ValueError(err_msg)
+
+    def factors(self, n: int) -> list[int]:
+        """查表分解单个正整数 n <= limit, 结果与 factors(n) 相同."""
+        self._check(np.asarray([n]))
+        spf: np.ndarray = self.spf
+        factor_lst: list[int] = []
+        while n > 1:
+            p: int = int(spf[n])
+            factor_lst.append(p)
+            n //= p
+        return factor_lst
+
+    def factors_batch(self, values: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """批量分解一组正整数, 以 CSR 形式返回, 不创建任何 Python 列表.
+
+        第 i 个数的质因子(升序)为 factor_values[offsets[i]:offsets[i + 1]].
+
+        Args:
+            values (np.ndarray): 待分解的正整数数组, 每个元素都不超过 limit
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: (factor_values, offsets), 分别为 uint32 与 int64 数组
+
+        """
+        values = np.asarray(values, dtype=np.int64).ravel()
+        self._check(values)
+        spf: np.ndarray = self.spf
+        # 第一遍: 统计每个数的质因子个数(计重数), 确定每个数在结果中的偏移
+        counts: np.ndarray = np.zeros(len(values), dtype=np.int64)
+        rest: np.ndarray = values.copy()
+        active: np.ndarray = np.flatnonzero(rest > 1)
+        while active.size:
+            counts[active] += 1
+            rest[active] //= spf[rest[active]]
+            active = active[rest[active] > 1]
+        offsets: np.ndarray = np.zeros(len(values) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        # 第二遍: 每轮为所有未分解完的数写入下一个质因子
+        factor_values: np.ndarray = np.empty(offsets[-1], dtype=np.uint32)
+        rest = values.copy()
+        active = np.flatnonzero(rest > 1)
+        k: int = 0
+        while active.size:
+            p: np.ndarray = spf[rest[active]]
+            factor_values[offsets[active] + k] = p
+            rest[active] //= p
+            active = active[rest[active] > 1]
+            k += 1
+        return factor_values, offsets
+
+
+def test_smallest_prime_factor_table() -> None:
+    """SmallestPrimeFactorTable的测试函数."""
+    table: SmallestPrimeFactorTable = SmallestPrimeFactorTable(10_000)
+    assert table.spf.dtype == np.uint32, "最小质因子表应为 uint32 数组"
+    assert table.factors(60) == [2, 2, 3, 5], "正整数 60 的质因子计算错误"
+    assert table.factors(9973) == [9973], "质数 9973 的质因子计算错误"
+    values: np.ndarray = np.arange(1, 10_001)
+    factor_values, offsets = table.factors_batch(values)
+    for i in (0, 1, 59, 1023, 9971, 9999):
+        n: int = int(values[i])
+        assert factor_values[offsets[i] : offsets[i + 1]].tolist() == factors(n), f"正整数 {n} 的批量分解结果错误"
+    assert offsets[-1] == sum(len(factors(int(n))) for n in values), "批量分解的质因子总数错误"
+    with pytest.raises(ValueError, match="查询值必须在"):
+        table.factors(10_001)
 
 
 # Exercise 4.5 计算给定正整数 n 的真因数
+def iter_true_factors(n: int) -> Iterator[int]:
+    """惰性产出正整数 n 的所有真因数(不保证升序).
+
+    由质因子分解 n = p1^e1 * ... * pk^ek 逐个组合出因数, 不需要试除 n 以内的每个整数.
+
+    Args:
+        n (int): 给定的正整数
+
+    Yields:
+        int: n 的真因数
+
+    """
+    prime_powers: list[tuple[int, int]] = sorted(Counter(factors(n)).items())
+
+    def combine(k: int, divisor: int) -> Iterator[int]:
+        # 依次为第 k 个质因子选择指数 0 ~ e_k
+        if k == len(prime_powers):
+            if divisor != n:
+                yield divisor
+            return
+        p, e = prime_powers[k]
+        for _ in range(e + 1):
+            yield from combine(k + 1, divisor)
+            divisor *= p
+
+    yield from combine(0, 1)
+
+
 def true_factors(n: int) -> list[int]:
     """计算正整数 n 的真因素.
 
@@ -168,14 +2130,179 @@ def true_factors(n: int) -> list[int]:
         list[int]: 给定正整数的真因素列表
 
     """
-    true_factor_lst: list[int] = [i for i in range(1, n) if n % i == 0]
+    true_factor_lst: list[int] = sorted(iter_true_factors(n))
     return true_factor_lst
 
 
+def true_factor_count(n: int) -> int:
+    """计算正整数 n 的真因数个数 τ(n) - 1, 不生成因数列表."""
+    return math.prod(e + 1 for e in Counter(factors(n)).values()) - 1
+
+
+def true_factor_sum(n: int) -> int:
+    """计算正整数 n 的真因数之和 σ(n) - n, 不生成因数列表.
+
+    σ(n) 为积性函数, σ(p^e) = (p^(e+1) - 1) / (p - 1).
+    """
+    return math.prod((p ** (e + 1) - 1) // (p - 1) for p, e in Counter(factors(n)).items()) - n
+
+
 def test_true_factors() -> None:
     """true_factors()的测试函数."""
     assert true_factors(12) == [1, 2, 3, 4, 6], "正整数 12 的真因数计算错误"
     assert true_factors(21) == [1, 3, 7], "正整数 21 的真因数计算错误"
+    assert true_factors(1) == [], "正整数 1 没有真因数"
+    assert true_factors(97) == [1], "质数 97 的真因数只有 1"
+    n: int = 10**12 + 39 * 2 * 3
+    divisors: list[int] = [d for i in range(1, math.isqrt(n) + 1) if n % i == 0 for d in {i, n // i}]
+    assert true_factors(n) == sorted(divisors)[:-1], f"正整数 {n} 的真因数计算错误"
+    assert true_factor_count(n) == len(divisors) - 1, f"正整数 {n} 的真因数个数计算错误"
+    assert true_factor_sum(n) == sum(divisors) - n, f"正整数 {n} 的真因数之和计算错误"
+    assert true_factor_sum(1) == 0, "正整数 1 的真因数之和为 0"
+    assert true_factor_sum(28) == 28, "完美数 28 的真因数之和等于其自身"
+
+
+# MultiplicativeSieve 分块处理时每块的元素个数
+_SIEVE_BLOCK: int = 1 << 20
+
+
+class MultiplicativeSieve:
+    """[1, N] 内常用积性函数的筛法表.
+
+    对 sqrt(N) 以内的每个质数 p, 按 p 的各次幂批量更新其倍数位置的局部因子;
+    剔除这些小质因子后剩余部分只可能是 1 或一个大于 sqrt(N) 的质数, 最后统一处理.
+    总耗时约为 O(N log log N) 次数组运算.
+
+    Attributes:
+        limit (int): 上界 N
+        sigma (np.ndarray): 因数和 σ(n)
+        tau (np.ndarray): 因数个数 τ(n)
+        phi (np.ndarray): 欧拉函数 φ(n)
+        mu (np.ndarray): 莫比乌斯函数 μ(n)
+
+    各数组下标即为 n, 下标 0 处的值为 0; 未在 functions 中请求的函数不计算, 对应属性为 None.
+
+    """
+
+    FUNCTIONS: tuple[str, ...] = ("sigma", "tau", "phi", "mu")
+
+    def __init__(self, limit: int, functions: tuple[str, ...] = FUNCTIONS) -> None:
+        """筛出 [1, limit] 内 functions 指定的积性函数值."""
+        unknown: set[str] = set(functions) - set(self.FUNCTIONS)
+        if unknown:
+            err_msg: str = f"未知的积性函数: {sorted(unknown)}"
+            raise ValueError(err_msg)
+        if not 1 <= limit < 1 << 32:
+            err_msg: str = "limit 必须在 [1, 2^32) 范围内"
+            raise ValueError(err_msg)
+        self.limit: int = limit
+        size: int = limit + 1
+        # σ(n) < 8n 对 2^64 以内的 n 都成立, 据此选择足够容纳结果的最小整数类型
+        sigma_dtype: type = np.uint32 if limit < 1 << 29 else np.uint64
+        sigma: np.ndarray | None = np.ones(size, dtype=sigma_dtype) if "sigma" in functions else None
+        tau: np.ndarray | None = np.ones(size, dtype=np.uint16) if "tau" in functions else None
+        phi: np.ndarray | None = np.ones(size, dtype=np.uint32) if "phi" in functions else None
+        mu: np.ndarray | None = np.ones(size, dtype=np.int8) if "mu" in functions else None
+        rest: np.ndarray = np.arange(size, dtype=np.uint32)
+
+        for p in _base_primes(math.isqrt(limit)).tolist():
+            # 局部因子数组的第 j - 1 项对应倍数 p * j, 只为请求的函数分配
+            count: int = limit // p
+            s_term: np.ndarray | None = np.full(count, 1 + p, dtype=sigma_dtype) if sigma is not None else None
+            t_term: np.ndarray | None = np.full(count, 2, dtype=np.uint16) if tau is not None else None
+            f_term: np.ndarray | None = np.full(count, p - 1, dtype=np.uint32) if phi is not None else None
+            rest[p::p] //= p
+            step: int = 1
+            pk: int = p
+            while pk <= limit // p:
+                # 能被 p^(k+1) 整除的倍数: σ 加上 p^(k+1), τ 加 1, φ 乘以 p
+                step *= p
+                pk *= p
+                higher: slice = slice(step - 1, None, step)
+                if s_term is not None:
+                    s_term[higher] += pk
+                if t_term is not None:
+                    t_term[higher] += 1
+                if f_term is not None:
+                    f_term[higher] *= p
+                rest[pk::pk] //= p
+            if sigma is not None:
+                sigma[p::p] *= s_term
+            if tau is not None:
+                tau[p::p] *= t_term
+            if phi is not None:
+                phi[p::p] *= f_term
+            if mu is not None:
+                mu[p::p] *= -1
+                mu[p * p :: p * p] = 0
+
+        # 剩余的大质因子 q 在每个 n 中至多出现一次; 分块处理, 临时数组的大小与 N 无关
+        for lo in range(0, size, _SIEVE_BLOCK):
+            big: np.ndarray = np.flatnonzero(rest[lo : lo + _SIEVE_BLOCK] > 1)
+            q: np.ndarray = rest[lo + big]
+            big += lo
+            if sigma is not None:
+                sigma[big] *= (q + 1).astype(sigma_dtype)
+            if tau is not None:
+                tau[big] *= 2
+            if phi is not None:
+                phi[big] *= q - 1
+            if mu is not None:
+                mu[big] *= -1
+        for table in (sigma, tau, phi, mu):
+            if table is not None:
+                table[0] = 0
+        self.sigma: np.ndarray | None = sigma
+        self.tau: np.ndarray | None = tau
+        self.phi: np.ndarray | None = phi
+        self.mu: np.ndarray | None = mu
+
+    def _aliquot(self) -> np.ndarray:
+        """真因数和 s(n) = σ(n) - n, 以 int64 返回."""
+        if self.sigma is None:
+            err_msg: str = "需要在 functions 中包含 sigma"
+            raise ValueError(err_msg)
+        return self.sigma.astype(np.int64) - np.arange(self.limit + 1, dtype=np.int64)
+
+    def classify(self) -> np.ndarray:
+        """对 [0, N] 内的每个数分类: 1 为盈数, 0 为完美数, -1 为亏数(下标 0 处无意义)."""
+        return np.sign(self._aliquot() - np.arange(self.limit + 1)).astype(np.int8)
+
+    def perfect_numbers(self) -> np.ndarray:
+        """[1, N] 内的所有完美数, 即 σ(n) = 2n 的数; 分块比较, 不生成 N 长的临时数组."""
+        if self.sigma is None:
+            err_msg: str = "需要在 functions 中包含 sigma"
+            raise ValueError(err_msg)
+        found: list[np.ndarray] = []
+        for lo in range(1, self.limit + 1, _SIEVE_BLOCK):
+            hi: int = min(lo + _SIEVE_BLOCK, self.limit + 1)
+            doubled: np.ndarray = np.arange(2 * lo, 2 * hi, 2, dtype=self.sigma.dtype)
+            found.append(np.flatnonzero(self.sigma[lo:hi] == doubled) + lo)
+        return np.concatenate(found)
+
+    def amicable_pairs(self) -> np.ndarray:
+        """[1, N] 内的所有亲和数对 (a, b), a < b 且 b <= N, 形状为 (k, 2)."""
+        aliquot: np.ndarray = self._aliquot()
+        a: np.ndarray = np.flatnonzero((aliquot > np.arange(self.limit + 1)) & (aliquot <= self.limit))
+        b: np.ndarray = aliquot[a]
+        ok: np.ndarray = aliquot[b] == a
+        return np.column_stack((a[ok], b[ok]))
+
+
+def test_multiplicative_sieve() -> None:
+    """MultiplicativeSieve的测试函数."""
+    sieve: MultiplicativeSieve = MultiplicativeSieve(1000)
+    for n in range(1, 1001):
+        divisors: list[int] = [d for d in range(1, n + 1) if n % d == 0]
+        assert sieve.sigma[n] == sum(divisors), f"σ({n}) 计算错误"
+        assert sieve.tau[n] == len(divisors), f"τ({n}) 计算错误"
+        assert sieve.phi[n] == sum(math.gcd(n, k) == 1 for k in range(1, n + 1)), f"φ({n}) 计算错误"
+        prime_factors: list[int] = factors(n)
+        expected_mu: int = 0 if len(set(prime_factors)) < len(prime_factors) else (-1) ** len(prime_factors)
+        assert sieve.mu[n] == expected_mu, f"μ({n}) 计算错误"
+    assert sieve.classify()[[12, 28, 21]].tolist() == [1, 0, -1], "盈数/完美数/亏数分类错误"
+    pairs: np.ndarray = MultiplicativeSieve(10_000, ("sigma",)).amicable_pairs()
+    assert pairs.tolist() == [[220, 284], [1184, 1210], [2620, 2924], [5020, 5564], [6232, 6368]], "亲和数对计算错误"
 
 
 # Exercise 4.6 计算 10_000 以内的所有完美数
@@ -183,22 +2310,354 @@ def test_true_factors() -> None:
 def perfect_num(limit: int = 10_000) -> list[int]:
     """计算 10_000 以内的完美数.
 
+    使用积性函数筛一次性求出所有 σ(n), 完美数即满足 σ(n) = 2n 的数.
+
     Returns:
         list[int]: 10_000 以内完美数的列表
 
     """
-    result_lst: list[int] = []
-    for i in range(1, limit + 1):
-        true_factor_lst: list[int] = true_factors(i)
-        if sum(true_factor_lst) == i:
-            result_lst.append(i)
-    return result_lst
+    if limit < 1:
+        return []
+    return MultiplicativeSieve(limit, ("sigma",)).perfect_numbers().tolist()
 
 
 def test_perfect_num() -> None:
     """perfect_num()的测试函数."""
     assert perfect_num(limit=100) == [6, 28], "100 以内的完美数计算错误"
     assert perfect_num() == [6, 28, 496, 8128], "10_000 以内的完美数计算错误"
+    assert perfect_num(0) == [], "limit < 1 时没有完美数"
+
+
+# 质数与质因子列表的紧凑存储格式
+# 与 30 互质的 8 个余数, 模 30 轮式位图中第 j 位对应余数 _WHEEL_RESIDUES[j]
+_WHEEL_RESIDUES: np.ndarray = np.array([1, 7, 11, 13, 17, 19, 23, 29], dtype=np.int64)
+_WHEEL_BIT: np.ndarray = np.full(30, -1, dtype=np.int64)
+_WHEEL_BIT[_WHEEL_RESIDUES] = np.arange(8)
+_POPCOUNT: np.ndarray = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1)
+_RANK_BLOCK: int = 64  # 轮式位图每 64 字节记录一次累计元素个数, 用于按下标定位
+_GAP_BLOCK: int = 64  # 增量列表每 64 个元素设置一个采样点
+
+
+def _normalize_index(i: int, length: int) -> int:
+    """把可能为负数的下标转换为 [0, length) 内的下标."""
+    j: int = i + length if i < 0 else i
+    if not 0 <= j < length:
+        err_msg: str = "下标超出范围"
+        raise IndexError(err_msg)
+    return j
+
+
+class WheelBitset(Sequence):
+    """模 30 轮式位图: 每 30 个连续整数只用 1 字节记录其中 8 个与 30 互质的位置.
+
+    适合存储一段区间内的全部质数, 每个整数区间约占 1/30 字节; 2, 3, 5 单独记录.
+    下标访问借助每 64 字节一次的累计计数定位到块, 只解码该块.
+    """
+
+    def __init__(self, data: np.ndarray, base: int, small: tuple[int, ...]) -> None:
+        """由位图字节构造, 第 k 字节对应区间 [30 * (base + k), 30 * (base + k) + 30)."""
+        self._data: np.ndarray = data
+        self._base: int = base
+        self._small: tuple[int, ...] = small
+        block_counts: np.ndarray = (
+            np.add.reduceat(_POPCOUNT[data], np.arange(0, len(data), _RANK_BLOCK)) if len(data) else data
+        )
+        self._rank: np.ndarray = np.concatenate(([0], np.cumsum(block_counts, dtype=np.int64)))
+        self._len: int = len(small) + int(self._rank[-1])
+
+    @classmethod
+    def from_chunks(cls, chunks: Iterable[np.ndarray], start: int, end: int) -> "WheelBitset":
+        """由若干段升序质数构造, 所有质数都必须位于 [start, end] 内."""
+        base: int = max(start, 0) // 30
+        data: np.ndarray = np.zeros(max(end // 30 - base + 1, 0), dtype=np.uint8)
+        small: list[int] = []
+        for chunk in chunks:
+            values: np.ndarray = np.asarray(chunk, dtype=np.int64)
+            small.extend(values[values <= 5].tolist())
+            values = values[values > 5]
+            bits: np.ndarray = _WHEEL_BIT[values % 30]
+            if (bits < 0).any():
+                err_msg: str = "轮式位图只能存储 2, 3, 5 以及与 30 互质的整数"
+                raise ValueError(err_msg)
+            np.bitwise_or.at(data, values // 30 - base, (1 << bits).astype(np.uint8))
+        return cls(data, base, tuple(small))
+
+    @classmethod
+    def from_range(cls, start: int, end: int) -> "WheelBitset":
+        """分段筛出 [start, end] 内的质数并直接写入位图, 不生成完整的质数列表."""
+        return cls.from_chunks(_iter_prime_segments(start, end), start, end)
+
+    @property
+    def nbytes(self) -> int:
+        """位图占用的字节数."""
+        return self._data.nbytes + self._rank.nbytes
+
+    def _decode(self, byte_lo: int, byte_hi: int) -> np.ndarray:
+        """解码第 [byte_lo, byte_hi) 字节中的全部元素(升序)."""
+        bits: np.ndarray = np.unpackbits(self._data[byte_lo:byte_hi, None], axis=1, bitorder="little")
+        rows, cols = np.nonzero(bits)
+        return 30 * (self._base + byte_lo + rows.astype(np.int64)) + _WHEEL_RESIDUES[cols]
+
+    def _decode_range(self, lo: int, hi: int) -> np.ndarray:
+        """解码第 [lo, hi) 个轮式元素(不含 2, 3, 5), 只展开涉及的块."""
+        block_lo: int = int(np.searchsorted(self._rank, lo, side="right")) - 1
+        block_hi: int = int(np.searchsorted(self._rank, hi, side="left"))
+        values: np.ndarray = self._decode(block_lo * _RANK_BLOCK, block_hi * _RANK_BLOCK)
+        offset: int = int(self._rank[block_lo])
+        return values[lo - offset : hi - offset]
+
+    def __len__(self) -> int:
+        """元素个数."""
+        return self._len
+
+    def __contains__(self, n: object) -> bool:
+        """检查 n 对应的比特位."""
+        if not isinstance(n, int | np.integer):
+            return False
+        n = int(n)
+        if n <= 5:
+            return n in self._small
+        bit: int = int(_WHEEL_BIT[n % 30])
+        k: int = n // 30 - self._base
+        return bit >= 0 and 0 <= k < len(self._data) and bool(self._data[k] >> bit & 1)
+
+    def __iter__(self) -> Iterator[int]:
+        """逐块解码并产出全部元素."""
+        yield from self._small
+        step: int = _RANK_BLOCK * 64
+        for lo in range(0, len(self._data), step):
+            yield from self._decode(lo, lo + step).tolist()
+
+    def __getitem__(self, i: int | slice) -> int | np.ndarray:
+        """按下标取元素, 切片返回 int64 数组."""
+        n_small: int = len(self._small)
+        if isinstance(i, slice):
+            idx: range = range(*i.indices(self._len))
+            if not idx:
+                return np.empty(0, dtype=np.int64)
+            lo: int = min(idx[0], idx[-1])
+            hi: int = max(idx[0], idx[-1]) + 1
+            values: np.ndarray = np.concatenate(
+                (
+                    np.array(self._small[lo:hi], dtype=np.int64),
+                    self._decode_range(max(lo - n_small, 0), max(hi - n_small, 0)),
+                ),
+            )
+            return values[idx.start - lo :: idx.step]
+        j: int = _normalize_index(i, self._len)
+        if j < n_small:
+            return self._small[j]
+        return int(self._decode_range(j - n_small, j - n_small + 1)[0])
+
+
+def _varint_encode(values: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """把非负整数数组编码为 LEB128 变长整数, 返回 (字节数组, 每个值占用的字节数)."""
+    sizes: np.ndarray = np.ones(len(values), dtype=np.int64)
+    rest: np.ndarray = values >> 7
+    while (more := rest > 0).any():
+        sizes += more
+        rest >>= 7
+    ends: np.ndarray = np.cumsum(sizes)
+    starts: np.ndarray = ends - sizes
+    data: np.ndarray = np.zeros(int(ends[-1]) if len(ends) else 0, dtype=np.uint8)
+    for k in range(int(sizes.max()) if len(sizes) else 0):
+        # 每个字节保存 7 位, 最高位为 1 表示后面还有字节
+        m: np.ndarray = sizes > k
+        data[starts[m] + k] = ((values[m] >> (7 * k)) & 0x7F) | np.where(sizes[m] > k + 1, 0x80, 0)
+    return data, sizes
+
+
+def _varint_decode(data: np.ndarray) -> np.ndarray:
+    """解码一段完整的 LEB128 字节序列为 int64 数组."""
+    if not len(data):
+        return np.empty(0, dtype=np.int64)
+    last: np.ndarray = (data & 0x80) == 0  # 每个值的最后一个字节
+    starts: np.ndarray = np.concatenate(([0], np.flatnonzero(last)[:-1] + 1))
+    group: np.ndarray = np.cumsum(last) - last
+    shift: np.ndarray = 7 * (np.arange(len(data)) - starts[group])
+    return np.add.reduceat((data & 0x7F).astype(np.int64) << shift, starts)
+
+
+class GapList(Sequence):
+    """增量编码的非降序整数列表, 适合存储质数列表和质因子列表.
+
+    相邻元素的差值以 LEB128 变长整数存储, 质数间隔绝大多数只占 1 字节.
+    每 64 个元素记录一个采样点(该元素的值与字节偏移), 随机访问只需解码一个块.
+    """
+
+    def __init__(self, data: np.ndarray, block_first: np.ndarray, block_offsets: np.ndarray, length: int) -> None:
+        """由编码后的字节与采样点构造."""
+        self._data: np.ndarray = data
+        self._block_first: np.ndarray = block_first
+        self._block_offsets: np.ndarray = np.concatenate((block_offsets, [len(data)]))
+        self._len: int = length
+
+    @classmethod
+    def from_chunks(cls, chunks: Iterable[np.ndarray]) -> "GapList":
+        """由若干段非降序非负整数构造, 逐段编码, 不需要一次拿到全部元素."""
+        parts: list[np.ndarray] = []
+        firsts: list[np.ndarray] = []
+        offsets: list[np.ndarray] = []
+        pending: np.ndarray = np.empty(0, dtype=np.int64)
+        prev: int = 0
+        size: int = 0
+        length: int = 0
+        for chunk in itertools.chain(chunks, [None]):
+            if chunk is not None:
+                pending = np.concatenate((pending, np.asarray(chunk, dtype=np.int64)))
+            # 只编码整块, 不足一块的尾部留到下一段, 最后一段全部编码
+            take: int = len(pending) if chunk is None else len(pending) // _GAP_BLOCK * _GAP_BLOCK
+            if not take:
+                continue
+            values: np.ndarray = pending[:take]
+            pending = pending[take:]
+            gaps: np.ndarray = np.diff(values, prepend=prev)
+            if (gaps < 0).any() or values[0] < 0:
+                err_msg: str = "GapList 只能存储非降序的非负整数"
+                raise ValueError(err_msg)
+            data, sizes = _varint_encode(gaps)
+            starts: np.ndarray = np.cumsum(sizes) - sizes
+            firsts.append(values[::_GAP_BLOCK])
+            offsets.append(size + starts[::_GAP_BLOCK])
+            parts.append(data)
+            prev = int(values[-1])
+            size += len(data)
+            length += take
+
+        def join(arrays: list[np.ndarray], dtype: type) -> np.ndarray:
+            return np.concatenate(arrays) if arrays else np.empty(0, dtype=dtype)
+
+        return cls(join(parts, np.uint8), join(firsts, np.int64), join(offsets, np.int64), length)
+
+    @classmethod
+    def from_values(cls, values: Iterable[int] | np.ndarray) -> "GapList":
+        """由非降序非负整数构造."""
+        return cls.from_chunks([np.fromiter(values, dtype=np.int64) if not isinstance(values, np.ndarray) else values])
+
+    @classmethod
+    def from_range(cls, start: int, end: int) -> "GapList":
+        """分段筛出 [start, end] 内的质数并逐段编码, 不生成完整的质数列表."""
+        return cls.from_chunks(_iter_prime_segments(start, end))
+
+    @property
+    def nbytes(self) -> int:
+        """编码数据与采样点占用的字节数."""
+        return self._data.nbytes + self._block_first.nbytes + self._block_offsets.nbytes
+
+    def _decode_blocks(self, block_lo: int, block_hi: int) -> np.ndarray:
+        """解码第 [block_lo, block_hi) 块的全部元素."""
+        gaps: np.ndarray = _varint_decode(self._data[self._block_offsets[block_lo] : self._block_offsets[block_hi]])
+        gaps[0] = self._block_first[block_lo]
+        return np.cumsum(gaps)
+
+    def __len__(self) -> int:
+        """元素个数."""
+        return self._len
+
+    def __contains__(self, n: object) -> bool:
+        """二分定位采样点后只解码一个块."""
+        if not isinstance(n, int | np.integer) or not self._len:
+            return False
+        block: int = int(np.searchsorted(self._block_first, n, side="right")) - 1
+        if block < 0:
+            return False
+        values: np.ndarray = self._decode_blocks(block, block + 1)
+        k: int = int(np.searchsorted(values, n))
+        return k < len(values) and values[k] == n
+
+    def __iter__(self) -> Iterator[int]:
+        """逐批解码并产出全部元素."""
+        step: int = 1024
+        for block in range(0, len(self._block_first), step):
+            yield from self._decode_blocks(block, min(block + step, len(self._block_first))).tolist()
+
+    def __getitem__(self, i: int | slice) -> int | np.ndarray:
+        """按下标取元素, 切片返回 int64 数组."""
+        if isinstance(i, slice):
+            idx: range = range(*i.indices(self._len))
+            if not idx:
+                return np.empty(0, dtype=np.int64)
+            lo: int = min(idx[0], idx[-1])
+            hi: int = max(idx[0], idx[-1]) + 1
+            values: np.ndarray = self._decode_blocks(lo // _GAP_BLOCK, -(-hi // _GAP_BLOCK))
+            return values[idx.start - lo // _GAP_BLOCK * _GAP_BLOCK :: idx.step][: len(idx)]
+        j: int = _normalize_index(i, self._len)
+        block: int = j // _GAP_BLOCK
+        return int(self._decode_blocks(block, block + 1)[j - block * _GAP_BLOCK])
+
+
+class PrimeArray(Sequence):
+    """以 uint32 或 uint64 NumPy 数组存储的有序整数列表, 每个元素 4 或 8 字节."""
+
+    def __init__(self, values: Iterable[int] | np.ndarray) -> None:
+        """按最大值选择 uint32 或 uint64 存储, 已是合适类型的数组不复制."""
+        array: np.ndarray = np.asarray(values if isinstance(values, np.ndarray) else list(values))
+        dtype: type = np.uint32 if not array.size or int(array.max()) < 1 << 32 else np.uint64
+        self._values: np.ndarray = array.astype(dtype, copy=False)
+
+    @classmethod
+    def from_range(cls, start: int, end: int) -> "PrimeArray":
+        """筛出 [start, end] 内的质数."""
+        return cls(prime_filter(start, end, as_array=True))
+
+    @property
+    def values(self) -> np.ndarray:
+        """底层的 NumPy 数组."""
+        return self._values
+
+    @property
+    def nbytes(self) -> int:
+        """数组占用的字节数."""
+        return self._values.nbytes
+
+    def __len__(self) -> int:
+        """元素个数."""
+        return len(self._values)
+
+    def __contains__(self, n: object) -> bool:
+        """二分查找."""
+        if not isinstance(n, int | np.integer) or n < 0:
+            return False
+        k: int = int(np.searchsorted(self._values, n))
+        return k < len(self._values) and self._values[k] == n
+
+    def __iter__(self) -> Iterator[int]:
+        """依次产出 Python int."""
+        return map(int, self._values)
+
+    def __getitem__(self, i: int | slice) -> int | np.ndarray:
+        """按下标取元素, 切片返回共享内存的 NumPy 数组视图."""
+        if isinstance(i, slice):
+            return self._values[i]
+        return int(self._values[i])
+
+
+def test_compact_containers() -> None:
+    """WheelBitset, GapList, PrimeArray的测试函数."""
+    expected: list[int] = prime_filter(1, 200_000)
+    for container in (
+        WheelBitset.from_range(1, 200_000),
+        GapList.from_range(1, 200_000),
+        PrimeArray.from_range(1, 200_000),
+    ):
+        name: str = type(container).__name__
+        assert len(container) == len(expected), f"{name} 的元素个数错误"
+        assert list(container) == expected, f"{name} 迭代产出的元素错误"
+        assert [container[i] for i in (0, 1, 2, 3, 1000, -1)] == [expected[i] for i in (0, 1, 2, 3, 1000, -1)], (
+            f"{name} 的下标访问错误"
+        )
+        for s in (slice(2, 700), slice(5000, 9000, 7), slice(None, None, -1000), slice(-3, None)):
+            assert list(container[s]) == expected[s], f"{name} 的切片 {s} 错误"
+        reverse: np.ndarray = container[::-1]
+        assert [p for p in (2, 3, 5, 7, 199_999) if p in reverse] == [2, 3, 5, 7, 199_999], f"{name} 的逆序切片查询错误"
+        assert 199_999 in container, f"{name} 应包含质数 199999"
+        assert 199_997 not in container, f"{name} 不应包含合数 199997"
+        assert 4 not in container, f"{name} 不应包含合数 4"
+    window: WheelBitset = WheelBitset.from_range(10**9, 10**9 + 10**5)
+    assert list(window) == prime_filter(10**9, 10**9 + 10**5), "轮式位图存储任意区间的质数错误"
+    factor_lst: GapList = GapList.from_values(factors(2**10 * 3**5 * 1_000_003))
+    assert list(factor_lst) == [2] * 10 + [3] * 5 + [1_000_003], "GapList 存储质因子列表错误"
+    assert PrimeArray([2, 3, 5]).values.dtype == np.uint32, "PrimeArray 应优先使用 uint32"
 
 
 def main() -> None:
@@ -1,10 +1,16 @@
 """《Python玩转数学问题》Chapter 6 类和面向对象编程."""
 
 import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache, partial
 from math import isclose, pi, sin
-from typing import TYPE_CHECKING, Any, Callable  # noqa: UP035
+from typing import TYPE_CHECKING, Any, Callable, Iterator  # noqa: UP035
 
 import matplotlib.pyplot as plt
+import numpy as np
+import pytest
 import sympy
 from scipy.constants import G
 
@@ -78,26 +84,166 @@ class ClassTemplate:
         return "static method called"
 
 
+# 二阶导数的差分系数(需除以 h^2): 中心差分, 以及网格左端前 order // 2 个节点的单侧差分, 右端与左端对称
+_GRID_STENCILS: dict[int, tuple[np.ndarray, list[np.ndarray]]] = {
+    2: (np.array([1.0, -2.0, 1.0]), [np.array([2.0, -5.0, 4.0, -1.0])]),
+    4: (
+        np.array([-1.0, 16.0, -30.0, 16.0, -1.0]) / 12,
+        [
+            np.array([45.0, -154.0, 214.0, -156.0, 61.0, -10.0]) / 12,
+            np.array([10.0, -15.0, -4.0, 14.0, -6.0, 1.0]) / 12,
+        ],
+    ),
+}
+
+
+def _grid_d2(y: np.ndarray, h: float, order: int, *, left: bool, right: bool) -> np.ndarray:
+    """对一段等距节点上的函数值整体套用差分格式, 无法计算的位置为 NaN.
+
+    Args:
+        y (np.ndarray): 连续节点上的函数值
+        h (float): 节点间距
+        order (int): 差分精度阶数
+        left (bool): y[0] 是否为网格左端点, 是则用单侧差分补齐左端
+        right (bool): y[-1] 是否为网格右端点, 是则用单侧差分补齐右端
+
+    Returns:
+        np.ndarray: 与 y 等长的二阶导数
+
+    """
+    center, sided = _GRID_STENCILS[order]
+    m: int = order // 2
+    n: int = y.size
+    d2: np.ndarray = np.full(n, np.nan)
+    d2[m : n - m] = sum(c * y[j : n - 2 * m + j] for j, c in enumerate(center))
+    for i, coeffs in enumerate(sided):
+        if left:
+            d2[i] = coeffs @ y[: coeffs.size]
+        if right:
+            d2[n - 1 - i] = coeffs @ y[::-1][: coeffs.size]
+    return d2 / (h * h)
+
+
 class Derivative2:
-    """求二阶导数."""
+    r"""求二阶导数.
+
+    以中心差分 $D(h) = \frac{f(x-h) - 2f(x) + f(x+h)}{h^2} = f''(x) + c_1h^2 + c_2h^4 + \cdots$ 为基础,
+    依次取 h, h/2, h/4, ... 共 levels 层做 Richardson 外推, 逐层消去 h 的偶次误差项;
+    各层共用同一个 f(x), 每个点共计算 2 * levels + 1 次 f.
+    外推后截断误差约为 $h^{2levels}$, 舍入误差约为 $\epsilon|f| / (h / 2^{levels-1})^2$,
+    两者平衡得到默认步长 $h = (\epsilon \cdot 4^{levels-1})^{1/(2levels+2)}$;
+    步长取成浮点数能精确表示的 (x + h) - x, 自变量本身不引入舍入误差, 只在 |x| 很大时把 h 放大到至少 $\sqrt{\epsilon}|x|$.
+    每个点最后选取相邻两层外推值之差最小的一层作为结果.
+    """
 
-    def __init__(self, f: Callable, h: float = 1e-6) -> None:
+    def __init__(self, f: Callable, h: float | np.ndarray | None = None, levels: int = 4) -> None:
         r"""构造函数.
 
         Args:
-            f (Callable): 数学函数 $f(x) = x^2 - 1$
-            h (float): 公差值, 默认为 1e-6
+            f (Callable): 数学函数 $f(x) = x^2 - 1$, x 为数组时必须支持 NumPy 数组输入
+            h (float | np.ndarray | None): 最大一层的步长, 可以是与 x 广播的数组, 默认为 None, 按误差模型逐点选取
+            levels (int): 外推层数, 默认为 4; 为 1 时退化为步长 h 的普通中心差分
 
         """
+        if levels < 1:
+            err_msg: str = "外推层数必须 >= 1"
+            raise ValueError(err_msg)
         self.f: Callable = f
-        self.h: float = float(h)
+        self.h: float | np.ndarray | None = h
+        self.levels: int = levels
+
+    def __call__(self, x: float | np.ndarray) -> float | np.ndarray:
+        """调用函数, x 可以是标量或 NumPy 数组, 结果的形状为 x 与 h 广播后的形状."""
+        xa: np.ndarray = np.asarray(x, dtype=float)
+        levels: int = self.levels
+        if self.h is None:
+            eps: float = float(np.finfo(float).eps)
+            h: np.ndarray = np.maximum(
+                (eps * 4.0 ** (levels - 1)) ** (1 / (2 * levels + 2)), math.sqrt(eps) * np.abs(xa)
+            )
+        else:
+            # h 为数组时结果的形状由 x 与 h 共同广播决定
+            xa, h = np.broadcast_arrays(xa, np.asarray(self.h, dtype=float))
+        center: np.ndarray = xa[..., None]
+        # (x + h) - x 使步长恰好可以用浮点数表示
+        steps: np.ndarray = (center + h[..., None] / 2.0 ** np.arange(levels)) - center
+        points: np.ndarray = np.concatenate([center - steps, center + steps, center], axis=-1)
+        if xa.ndim == 0:
+            values: np.ndarray = np.array([self.f(float(t)) for t in points], dtype=float)
+        else:
+            values = np.asarray(self.f(points), dtype=float)
+        f0: np.ndarray = values[..., -1:]
+        table: np.ndarray = (values[..., :levels] - 2 * f0 + values[..., levels:-1]) / (steps * steps)
+        best: np.ndarray = table[..., 0]
+        best_err: np.ndarray = np.full(best.shape, np.inf)
+        for j in range(1, levels):
+            prev: np.ndarray = table[..., 0]
+            table = table[..., 1:] + (table[..., 1:] - table[..., :-1]) / (4.0**j - 1)
+            err: np.ndarray = np.abs(table[..., 0] - prev)
+            better: np.ndarray = err < best_err
+            best = np.where(better, table[..., 0], best)
+            best_err = np.where(better, err, best_err)
+        return float(best) if xa.ndim == 0 else best
+
+    def grid(self, start: float, stop: float, num: int, order: int = 2) -> tuple[np.ndarray, np.ndarray]:
+        """求等距网格上每个节点的二阶导数, 每个节点只计算一次 f.
 
-    def __call__(self, x: float) -> float:
-        """调用函数."""
-        f: Callable = self.f
-        h: float = self.h
-        r: float = (f(x - h) - 2 * f(x) + f(x + h)) / float(h * h)
-        return r
+        Args:
+            start (float): 网格起点
+            stop (float): 网格终点
+            num (int): 节点个数
+            order (int): 可选参数, 差分格式的精度阶数, 2 或 4
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: 节点坐标及各节点处的二阶导数
+
+        """
+        x, d2 = zip(*self.iter_grid(start, stop, num, order, chunk_size=num), strict=True)
+        return np.concatenate(x), np.concatenate(d2)
+
+    def iter_grid(
+        self,
+        start: float,
+        stop: float,
+        num: int,
+        order: int = 2,
+        chunk_size: int = 1 << 20,
+    ) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+        """分块求等距网格上的二阶导数, 内存占用只与 chunk_size 有关.
+
+        每块只对新节点计算 f, 末尾 order + 2 个函数值留作下一块的差分边界, 因此整个网格仍然每个节点只计算一次 f.
+        内部节点使用中心差分, 网格两端使用同阶的单侧差分.
+
+        Args:
+            start (float): 网格起点
+            stop (float): 网格终点
+            num (int): 节点个数
+            order (int): 可选参数, 差分格式的精度阶数, 2 或 4
+            chunk_size (int): 可选参数, 每块计算的节点个数
+
+        Yields:
+            tuple[np.ndarray, np.ndarray]: 一块节点的坐标及其二阶导数, 按顺序拼接即为整个网格
+
+        """
+        if order not in _GRID_STENCILS:
+            err_msg: str = f"不支持的差分精度阶数: {order}"
+            raise ValueError(err_msg)
+        if num < order + 2 or chunk_size < order + 2:
+            err_msg = f"{order} 阶差分格式至少需要 {order + 2} 个节点"
+            raise ValueError(err_msg)
+        h: float = (stop - start) / (num - 1)
+        carry: np.ndarray = np.empty(0)
+        done: int = 0
+        for k in range(0, num, chunk_size):
+            idx: np.ndarray = np.arange(k, min(k + chunk_size, num))
+            buf: np.ndarray = np.concatenate([carry, np.asarray(self.f(start + idx * h), dtype=float)])
+            first: int = idx[-1] + 1 - buf.size  # buf[0] 对应的节点编号
+            last: bool = idx[-1] == num - 1
+            d2: np.ndarray = _grid_d2(buf, h, order, left=first == 0, right=last)
+            hi: int = num if last else idx[-1] + 1 - order // 2
+            yield start + np.arange(done, hi) * h, d2[done - first : hi - first]
+            done = hi
+            carry = buf[-(order + 2) :]
 
     def __str__(self) -> str:
         """print(Instance)时打印返回的字符串."""
@@ -122,9 +268,304 @@ def test_Derivative2() -> None:
 
     d2f = Derivative2(f)
     d2sin = Derivative2(sin)
-    assert isclose(d2f(1.5), 1.999733711954832), "函数f(x)的二阶导数在 x = 1.5 时计算有误"
-    assert isclose(d2sin(pi), 0.0), "三角函数 sin 的二阶导数在 x = math.pi 时计算有误"
-    assert isclose(d2sin(pi / 2), -1.000088900582341), "三角函数 sin 的二阶导数在 x = math.pi/2 时计算有误"
+    assert isclose(d2f(1.5), 2.0, rel_tol=1e-10), "函数f(x)的二阶导数在 x = 1.5 时计算有误"
+    assert isclose(d2sin(pi), 0.0, abs_tol=1e-10), "三角函数 sin 的二阶导数在 x = math.pi 时计算有误"
+    assert isclose(d2sin(pi / 2), -1.0, rel_tol=1e-10), "三角函数 sin 的二阶导数在 x = math.pi/2 时计算有误"
+    assert isclose(Derivative2(f, h=1e-6, levels=1)(1.5), 1.999733711954832), "levels=1 时应为普通中心差分"
+
+    x: np.ndarray = np.linspace(-50, 50, 1001)
+    assert np.allclose(Derivative2(np.exp)(x / 10), np.exp(x / 10), rtol=1e-10, atol=0), "数组输入应逐点求导"
+    assert np.abs(Derivative2(np.sin)(x) + np.sin(x)).max() < 1e-9, "数组输入应逐点求导"
+    steps: np.ndarray = np.array([1e-2, 1e-3])
+    assert np.allclose(Derivative2(np.sin, h=steps)(1.0), -np.sin(1.0), rtol=1e-10), "h 为数组时应与 x 广播"
+    assert Derivative2(np.sin, h=steps)(x[:, None]).shape == (x.size, 2), "结果形状应为 x 与 h 广播后的形状"
+
+    calls: list[int] = []
+
+    def g(t: np.ndarray) -> np.ndarray:
+        calls.append(t.size)
+        return np.sin(t)
+
+    d2g: Derivative2 = Derivative2(g)
+    nodes, d2 = d2g.grid(0, 2 * pi, 1001)
+    assert sum(calls) == 1001, "网格上每个节点只应计算一次 f"
+    assert np.abs(d2 + np.sin(nodes)).max() < 1e-5, "二阶差分格式误差过大"
+    nodes, d2 = d2g.grid(0, 2 * pi, 1001, order=4)
+    assert np.abs(d2 + np.sin(nodes)).max() < 1e-9, "四阶差分格式误差过大"
+
+    calls.clear()
+    chunks: list[tuple[np.ndarray, np.ndarray]] = list(d2g.iter_grid(0, 2 * pi, 1001, order=4, chunk_size=97))
+    assert sum(calls) == 1001 and max(calls) == 97, "分块计算时每个节点也只应计算一次 f"
+    assert np.array_equal(np.concatenate([c[0] for c in chunks]), nodes), "分块节点拼接后应与整个网格一致"
+    assert np.array_equal(np.concatenate([c[1] for c in chunks]), d2), "分块结果应与一次性计算完全相同"
+
+
+@dataclass(frozen=True)
+class CompiledExpr:
+    """由 sympy 表达式编译得到的 NumPy 数值函数.
+
+    f, dfdx, d2fdx2 的参数均为 (x, *params), 可直接交给 bisection, newton_iter, Derivative2 等求解器.
+
+    Attributes:
+        expr (sympy.Expr): 原始表达式
+        symbol (sympy.Symbol): 自变量
+        params (tuple[sympy.Symbol, ...]): 额外参数
+        f (Callable): 表达式本身
+        dfdx (Callable): 一阶导函数(符号求导)
+        d2fdx2 (Callable): 二阶导函数(符号求导)
+
+    """
+
+    expr: sympy.Expr
+    symbol: sympy.Symbol
+    params: tuple[sympy.Symbol, ...]
+    f: Callable
+    dfdx: Callable
+    d2fdx2: Callable
+
+
+def _lambdify(expr: sympy.Expr, symbol: sympy.Symbol, params: tuple[sympy.Symbol, ...]) -> Callable:
+    """把表达式编译为 NumPy 函数, 与自变量无关的表达式也按 x 的形状广播."""
+    kernel: Callable = sympy.lambdify((symbol, *params), expr, modules="numpy")
+    if expr.has(symbol):
+        return kernel
+    return lambda x, *args: kernel(x, *args) * np.ones_like(x, dtype=float)
+
+
+@lru_cache(maxsize=128)
+def _compile_expr(expr: sympy.Expr, symbol: sympy.Symbol, params: tuple[sympy.Symbol, ...]) -> CompiledExpr:
+    """符号求导并编译, 以表达式的结构哈希为键缓存, 相同的表达式只做一次符号运算."""
+    d1: sympy.Expr = sympy.diff(expr, symbol)
+    d2: sympy.Expr = sympy.diff(d1, symbol)
+    return CompiledExpr(
+        expr,
+        symbol,
+        params,
+        _lambdify(expr, symbol, params),
+        _lambdify(d1, symbol, params),
+        _lambdify(d2, symbol, params),
+    )
+
+
+def compile_expr(
+    expr: sympy.Expr | str,
+    symbol: sympy.Symbol | None = None,
+    params: tuple[sympy.Symbol, ...] = (),
+) -> CompiledExpr:
+    """把 sympy 表达式编译为带一阶、二阶导函数的 NumPy 数值函数.
+
+    编译结果保存在 LRU 缓存中, 缓存键为表达式本身(sympy 表达式按结构比较和哈希),
+    重复求解同一个方程时直接复用已编译的函数, 跳过全部符号运算.
+
+    Args:
+        expr (sympy.Expr | str): 待编译的表达式, 字符串会先经过 sympy.sympify
+        symbol (sympy.Symbol | None): 可选参数, 自变量, 表达式只有一个自由符号时可省略
+        params (tuple[sympy.Symbol, ...]): 可选参数, 按顺序追加在自变量之后的参数符号
+
+    Returns:
+        CompiledExpr: 编译后的函数
+
+    """
+    expr = sympy.sympify(expr)
+    if symbol is None:
+        free: set[sympy.Symbol] = expr.free_symbols - set(params)
+        if len(free) != 1:
+            err_msg: str = f"无法确定自变量, 表达式中的自由符号为 {sorted(map(str, free))}"
+            raise ValueError(err_msg)
+        symbol = free.pop()
+    return _compile_expr(expr, symbol, tuple(params))
+
+
+def test_compile_expr() -> None:
+    """compile_expr()的测试函数."""
+    x, a = sympy.symbols("x a")
+    compiled: CompiledExpr = compile_expr(x**2 - 1)
+    assert compiled.f(3.0) == 8.0, "f(3) 计算错误"
+    assert compiled.dfdx(3.0) == 6.0, "f'(3) 计算错误"
+    assert np.array_equal(compiled.d2fdx2(np.array([1.0, 2.0])), [2.0, 2.0]), "常数二阶导数应按 x 的形状广播"
+    assert isclose(Derivative2(compiled.f)(1.5), 2.0, rel_tol=1e-10), "编译后的函数应能直接用于 Derivative2"
+
+    hits: int = _compile_expr.cache_info().hits
+    assert compile_expr(x**2 - 1) is compiled, "结构相同的表达式应命中缓存"
+    assert compile_expr("x**2 - 1") is compiled, "字符串表达式也应命中缓存"
+    assert _compile_expr.cache_info().hits == hits + 2, "缓存命中次数错误"
+
+    with_param: CompiledExpr = compile_expr(sympy.sin(a * x), x, (a,))
+    assert isclose(with_param.dfdx(0.0, 2.0), 2.0), "带参数表达式的导数计算错误"
+    with pytest.raises(ValueError, match="无法确定自变量"):
+        compile_expr(a * x)
+
+
+def _apply_rows(f: Callable, points: np.ndarray) -> np.ndarray:
+    """对每一行分别调用只接受单个点的 f."""
+    return np.array([f(p) for p in points], dtype=float)
+
+
+class _StencilEngine:
+    """Gradient 与 Hessian 共用的批量求值逻辑.
+
+    Attributes:
+        f (Callable): 多元函数
+        h (float | np.ndarray | None): 各变量的步长, 为 None 时按 x 的大小逐个选取
+        vectorized (bool): f 是否接受形状为 (m, n) 的点集并返回 m 个函数值
+        max_workers (int | None): 进程池大小, 为 1 时在当前进程计算
+
+    """
+
+    # 默认相对步长, 子类按差分格式的误差模型给出
+    _REL_STEP: float = 0.0
+
+    def __init__(
+        self,
+        f: Callable,
+        h: float | np.ndarray | None = None,
+        *,
+        vectorized: bool = True,
+        max_workers: int | None = 1,
+    ) -> None:
+        """构造函数.
+
+        Args:
+            f (Callable): 多元函数; vectorized 为 True 时入参为形状 (m, n) 的点集, 返回 m 个函数值,
+                否则入参为单个长度为 n 的点, 返回一个数
+            h (float | np.ndarray | None): 可选参数, 步长, 可以是标量或每个变量一个的数组
+            vectorized (bool): 可选参数, f 是否支持批量求值
+            max_workers (int | None): 可选参数, 进程池大小, 默认为 1 即单进程, None 为 CPU 核心数;
+                多进程时 f 必须可以被 pickle (模块级函数)
+
+        """
+        self.f: Callable = f
+        self.h: float | np.ndarray | None = h
+        self.vectorized: bool = vectorized
+        self.max_workers: int | None = max_workers
+
+    def _steps(self, x: np.ndarray) -> np.ndarray:
+        """各变量的步长, 取成浮点数能精确表示的值."""
+        h: np.ndarray = self._REL_STEP * np.maximum(np.abs(x), 1.0) if self.h is None else np.asarray(self.h, float)
+        return (x + np.broadcast_to(h, x.shape)) - x
+
+    def _evaluate(self, points: np.ndarray) -> np.ndarray:
+        """一次性计算所有差分节点上的函数值."""
+        f: Callable = self.f if self.vectorized else partial(_apply_rows, self.f)
+        if self.max_workers == 1:
+            return np.asarray(f(points), dtype=float)
+        workers: int = self.max_workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return np.concatenate(list(executor.map(f, np.array_split(points, workers))))
+
+
+class Gradient(_StencilEngine):
+    r"""用中心差分 $\frac{\partial f}{\partial x_i} \approx \frac{f(x + h_ie_i) - f(x - h_ie_i)}{2h_i}$ 求梯度.
+
+    全部 2n 个差分节点拼成一个 (2n, n) 数组, 只调用一次 f.
+    """
+
+    _REL_STEP: float = float(np.finfo(float).eps) ** (1 / 3)
+
+    def __call__(self, x: np.ndarray) -> np.ndarray:
+        """求 x 处的梯度.
+
+        Args:
+            x (np.ndarray): 长度为 n 的点
+
+        Returns:
+            np.ndarray: 长度为 n 的梯度
+
+        """
+        x = np.asarray(x, dtype=float)
+        h: np.ndarray = self._steps(x)
+        shift: np.ndarray = np.diag(h)
+        values: np.ndarray = self._evaluate(np.concatenate([x + shift, x - shift]))
+        return (values[: x.size] - values[x.size :]) / (2 * h)
+
+
+class Hessian(_StencilEngine):
+    r"""用中心差分求黑塞矩阵.
+
+    对角元 $H_{ii} \approx \frac{f(x + h_ie_i) - 2f(x) + f(x - h_ie_i)}{h_i^2}$,
+    非对角元 $H_{ij} \approx \frac{f(x_{++}) - f(x_{+-}) - f(x_{-+}) + f(x_{--})}{4h_ih_j}$, 其中 $x_{\pm\pm} = x \pm h_ie_i \pm h_je_j$.
+    黑塞矩阵对称, 只计算 i < j 的变量对, 共 1 + 2n + 2n(n - 1) 个差分节点, 拼成一个数组只调用一次 f.
+    对角元用到的 f(x ± h_ie_i) 同时给出梯度, 见 with_gradient().
+    """
+
+    _REL_STEP: float = float(np.finfo(float).eps) ** (1 / 4)
+
+    def __call__(self, x: np.ndarray) -> np.ndarray:
+        """求 x 处的黑塞矩阵.
+
+        Args:
+            x (np.ndarray): 长度为 n 的点
+
+        Returns:
+            np.ndarray: 形状为 (n, n) 的对称矩阵
+
+        """
+        return self.with_gradient(x)[1]
+
+    def with_gradient(self, x: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """同时求 x 处的梯度和黑塞矩阵, 不增加函数求值次数.
+
+        Args:
+            x (np.ndarray): 长度为 n 的点
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: 梯度及黑塞矩阵
+
+        """
+        x = np.asarray(x, dtype=float)
+        n: int = x.size
+        h: np.ndarray = self._steps(x)
+        shift: np.ndarray = np.diag(h)
+        i, j = np.triu_indices(n, k=1)
+        pairs: list[np.ndarray] = [x + si * shift[i] + sj * shift[j] for si, sj in ((1, 1), (1, -1), (-1, 1), (-1, -1))]
+        values: np.ndarray = self._evaluate(np.concatenate([x[None, :], x + shift, x - shift, *pairs]))
+        f0, fp, fm = values[0], values[1 : n + 1], values[n + 1 : 2 * n + 1]
+        fpp, fpm, fmp, fmm = values[2 * n + 1 :].reshape(4, -1)
+        hess: np.ndarray = np.diag((fp - 2 * f0 + fm) / (h * h))
+        hess[i, j] = hess[j, i] = (fpp - fpm - fmp + fmm) / (4 * h[i] * h[j])
+        return (fp - fm) / (2 * h), hess
+
+
+def _rosenbrock(points: np.ndarray) -> np.ndarray:
+    """测试用的 Rosenbrock 函数, 对每一行求值."""
+    return np.sum(100 * (points[:, 1:] - points[:, :-1] ** 2) ** 2 + (1 - points[:, :-1]) ** 2, axis=1)
+
+
+def test_Hessian() -> None:
+    """Gradient与Hessian的测试函数."""
+    x: np.ndarray = np.array([1.2, 0.8, -0.5])
+    grad: np.ndarray = np.array(
+        [
+            -400 * x[0] * (x[1] - x[0] ** 2) - 2 * (1 - x[0]),
+            200 * (x[1] - x[0] ** 2) - 400 * x[1] * (x[2] - x[1] ** 2) - 2 * (1 - x[1]),
+            200 * (x[2] - x[1] ** 2),
+        ],
+    )
+    hess: np.ndarray = np.array(
+        [
+            [1200 * x[0] ** 2 - 400 * x[1] + 2, -400 * x[0], 0],
+            [-400 * x[0], 202 + 1200 * x[1] ** 2 - 400 * x[2], -400 * x[1]],
+            [0, -400 * x[1], 200],
+        ],
+    )
+
+    calls: list[int] = []
+
+    def f(points: np.ndarray) -> np.ndarray:
+        calls.append(len(points))
+        return _rosenbrock(points)
+
+    assert np.allclose(Gradient(f)(x), grad, rtol=1e-8), "梯度计算错误"
+    g, h = Hessian(f).with_gradient(x)
+    assert calls == [6, 1 + 2 * 3 + 2 * 3 * 2], "所有差分节点应一次求值, 且只计算 i < j 的变量对"
+    assert np.allclose(h, hess, rtol=1e-6, atol=1e-5), "黑塞矩阵计算错误"
+    assert np.array_equal(h, h.T), "黑塞矩阵应对称"
+    assert np.allclose(g, grad, rtol=1e-6), "with_gradient() 的梯度计算错误"
+
+    a: np.ndarray = np.array([[4.0, 1.0], [1.0, 3.0]])
+    quadratic: Hessian = Hessian(lambda p: p @ a @ p / 2, vectorized=False)
+    assert np.allclose(quadratic([0.3, -2.0]), a), "二次型的黑塞矩阵应为其系数矩阵"
+    assert np.allclose(Hessian(_rosenbrock, max_workers=2)(x), h), "多进程计算结果应与单进程一致"
 
 
 class Teacher1: